@@ -0,0 +1,124 @@
+"""Substituto local do MySQL em SQLite para os benchmarks"""
+
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS historico_moedas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        moeda_origem TEXT NOT NULL,
+        moeda_destino TEXT NOT NULL,
+        valor_origem REAL NOT NULL,
+        valor_convertido REAL NOT NULL,
+        taxa_cambio REAL NOT NULL,
+        data_conversao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_historico_data_id ON historico_moedas (data_conversao, id);
+"""
+
+
+def _translate(query):
+    """Adapta o dialeto MySQL usado pelos módulos ao SQLite"""
+    query = query.replace("%s", "?")
+    query = query.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+    return re.sub(r"VALUES\((\w+)\)", r"excluded.\1", query)
+
+
+def _parse(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def _register_functions(raw):
+    raw.create_function("LEAST", -1, min, deterministic=True)
+    raw.create_function("GREATEST", -1, max, deterministic=True)
+    raw.create_function("UNIX_TIMESTAMP", 1, lambda v: _parse(v).timestamp(), deterministic=True)
+    raw.create_function(
+        "DATE_FORMAT", 2, lambda v, fmt: _parse(v).strftime(fmt), deterministic=True
+    )
+
+
+class _Cursor:
+    """Cursor com a interface usada do mysql.connector (placeholders %s, dictionary=True)"""
+
+    def __init__(self, conn, dictionary):
+        self._conn = conn
+        self._cursor = conn.raw.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, query, params=()):
+        with self._conn.lock:
+            self._cursor.execute(_translate(query), params)
+            self._rows = self._cursor.fetchall()
+        self._pos = 0
+
+    def executemany(self, query, seq):
+        with self._conn.lock:
+            self._cursor.executemany(_translate(query), seq)
+            self._rows = []
+        self._pos = 0
+
+    def _convert(self, rows):
+        if not self._dictionary:
+            return rows
+        names = [d[0] for d in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size=1):
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return self._convert(rows)
+
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return self._convert(rows)
+
+    def close(self):
+        self._cursor.close()
+
+
+class LocalConnection:
+    """Conexão SQLite compartilhada entre threads, protegida por lock"""
+
+    def __init__(self, path=":memory:"):
+        self.raw = sqlite3.connect(
+            path,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        _register_functions(self.raw)
+        self.raw.executescript(SCHEMA)
+        self.lock = threading.RLock()
+
+    def cursor(self, dictionary=False, **kwargs):
+        return _Cursor(self, dictionary)
+
+    def commit(self):
+        with self.lock:
+            self.raw.commit()
+
+    def rollback(self):
+        with self.lock:
+            self.raw.rollback()
+
+    def ping(self, **kwargs):
+        pass
+
+    def close(self):
+        # Devolução ao "pool": a conexão continua aberta
+        pass
+
+
+def install(path=":memory:"):
+    """Faz database.db entregar conexões SQLite no lugar do pool MySQL"""
+    from database import db
+
+    conn = LocalConnection(path)
+    db.get_connection = lambda timeout=5.0: conn
+    return conn
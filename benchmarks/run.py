@@ -0,0 +1,233 @@
+"""Benchmarks offline do Segundo Cérebro.
+
+Sobe um servidor local que emula as APIs externas, usa SQLite no lugar do
+MySQL e mede vazão e latências p50/p99 dos caminhos quentes. O resultado
+sai em JSON para comparar execuções:
+
+    python -m benchmarks.run --latency-ms 50 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubAPIServer, USD_RATES
+from benchmarks import local_db
+
+
+def measure(name, func, iterations, warmup=1):
+    """Executa func repetidamente e resume as latências em milissegundos"""
+    for _ in range(warmup):
+        func(0)
+    samples = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            result = func(i)
+            if isinstance(result, dict) and "error" in result:
+                errors += 1
+        except Exception:
+            errors += 1
+        samples.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "name": name,
+        "iterations": iterations,
+        "errors": errors,
+        "throughput_per_s": iterations / total if total else None,
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99),
+        "max_ms": samples[-1]
+    }
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return None
+    index = min(int(round(pct / 100 * (len(sorted_samples) - 1))), len(sorted_samples) - 1)
+    return sorted_samples[index]
+
+
+def bench_currency(iterations):
+    from modules.moedas import CurrencyConverter
+
+    currencies = list(USD_RATES)
+    pairs = [(a, b) for a in currencies for b in currencies if a != b]
+    converter = CurrencyConverter()
+    converter._history_index_checked = True
+    results = [
+        measure(
+            "convert_currency",
+            lambda i: converter.convert_currency(100 + i, *pairs[i % len(pairs)]),
+            iterations
+        ),
+    ]
+
+    amounts = [float(i + 1) for i in range(1000)]
+    sources = [pairs[i % len(pairs)][0] for i in range(1000)]
+    targets = [pairs[i % len(pairs)][1] for i in range(1000)]
+    results.append(measure(
+        "convert_many_1000",
+        lambda i: converter.convert_many(amounts, sources, targets),
+        max(iterations // 10, 1)
+    ))
+
+    # Cache em memória vazio, tabela servida pelo snapshot local
+    results.append(measure(
+        "convert_currency_snapshot_hit",
+        lambda i: (converter.rate_cache.clear(), converter.convert_currency(10, "USD", "BRL"))[1],
+        max(iterations // 10, 1)
+    ))
+
+    # Sem snapshot: cada conversão busca a tabela na API
+    snapshots, converter.snapshots = converter.snapshots, None
+    results.append(measure(
+        "convert_currency_cold_cache",
+        lambda i: (converter.rate_cache.clear(), converter.convert_currency(10, "USD", "BRL"))[1],
+        max(iterations // 10, 1)
+    ))
+    converter.snapshots = snapshots
+
+    converter.history_writer.flush()
+    results.append(measure(
+        "get_conversion_history",
+        lambda i: converter.get_conversion_history(limit=50),
+        iterations
+    ))
+    converter.close()
+    return results, converter
+
+
+def bench_weather(iterations):
+    from modules import clima
+
+    cities = [f"Cidade {n}" for n in range(20)]
+    clima._cache.clear()
+    return [
+        measure(
+            "get_weather_uncached",
+            lambda i: clima.get_weather(cities[i % len(cities)], use_cache=False),
+            iterations
+        ),
+        measure(
+            "get_weather_cached",
+            lambda i: clima.get_weather(cities[i % len(cities)]),
+            iterations
+        ),
+    ]
+
+
+def bench_search(iterations, converter):
+    from modules.busca import SearchIndex
+
+    index = SearchIndex()
+    for row in converter.get_conversion_history(limit=5000):
+        index.add(
+            ("conversao", row["id"]),
+            f"{row['moeda_origem']} {row['moeda_destino']} {row['valor_origem']:.2f}",
+            row
+        )
+    queries = ["usd", "usd br", "e", "brl 10", "jpy eur"]
+    return [
+        measure(
+            "search_as_you_type",
+            lambda i: index.search(queries[i % len(queries)]),
+            iterations
+        ),
+    ]
+
+
+def bench_history_render(iterations, converter):
+    """Renderização da tabela de histórico sem janela visível (requer display)"""
+    try:
+        import customtkinter as ctk
+        root = ctk.CTk()
+        root.withdraw()
+    except Exception as e:
+        return [{"name": "render_history_table", "skipped": f"sem display: {e}"}]
+
+    from modules.componentes import RecyclingTable
+
+    table = RecyclingTable(root, ["Data", "De", "Para", "Valor", "Resultado"],
+                           [120, 100, 100, 100, 100], max_rows=20)
+    history = converter.get_conversion_history(limit=200)
+
+    def render(i):
+        window = history[i % 10:i % 10 + 20]
+        table.update([
+            (item["id"], [
+                item["data_conversao"].strftime("%d/%m %H:%M"),
+                item["moeda_origem"],
+                item["moeda_destino"],
+                f"{item['valor_origem']:.2f}",
+                f"{item['valor_convertido']:.2f}"
+            ])
+            for item in window
+        ])
+        root.update_idletasks()
+
+    try:
+        return [measure("render_history_table", render, iterations)]
+    finally:
+        root.destroy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline do Segundo Cérebro")
+    parser.add_argument("--latency-ms", type=float, default=20,
+                        help="latência simulada das APIs por requisição")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    server = StubAPIServer(latency_ms=args.latency_ms).start()
+    os.environ["EXCHANGERATE_API_URL"] = f"{server.base_url}/v6"
+    os.environ["EXCHANGERATE_API_KEY"] = "bench"
+    os.environ["OPENWEATHER_API_URL"] = f"{server.base_url}/data/2.5"
+    os.environ["OPENWEATHER_API_KEY"] = "bench"
+    os.environ.setdefault("RATE_SNAPSHOT_FILE", ":memory:")
+    # O servidor local não tem cota: o orçamento diário não pode limitar as medições
+    os.environ.setdefault("EXCHANGERATE_DAILY_QUOTA", "1000000000")
+    os.environ.setdefault("OPENWEATHER_DAILY_QUOTA", "1000000000")
+    os.environ.setdefault("API_QUOTA_FILE", ":memory:")
+    local_db.install()
+
+    try:
+        currency_results, converter = bench_currency(args.iterations)
+        results = currency_results
+        results += bench_weather(args.iterations)
+        results += bench_search(args.iterations, converter)
+        results += bench_history_render(args.iterations, converter)
+    finally:
+        server.stop()
+
+    report = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency_ms": args.latency_ms,
+        "upstream_requests": server.requests,
+        "results": results
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
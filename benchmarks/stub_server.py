@@ -0,0 +1,88 @@
+"""Servidor HTTP local que emula as APIs exchangerate-api e OpenWeather"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Taxas fixas em relação ao USD usadas para montar as tabelas
+USD_RATES = {
+    "USD": 1.0, "EUR": 0.92, "GBP": 0.79, "BRL": 5.05,
+    "JPY": 151.3, "CAD": 1.36, "AUD": 1.52, "CHF": 0.9
+}
+
+
+class StubAPIServer:
+    """Servidor em thread própria com latência configurável por requisição"""
+
+    def __init__(self, latency_ms: float = 0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                status, body = server.route(urlparse(self.path))
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, url):
+        parts = [p for p in url.path.split("/") if p]
+        # /v6/{chave}/latest/{base}
+        if len(parts) == 4 and parts[0] == "v6" and parts[2] == "latest":
+            base = parts[3]
+            if base not in USD_RATES:
+                return 404, {"result": "error", "error-type": "unsupported-code"}
+            rates = {code: rate / USD_RATES[base] for code, rate in USD_RATES.items()}
+            return 200, {"result": "success", "base_code": base, "conversion_rates": rates}
+        # /v6/{chave}/pair/{origem}/{destino}
+        if len(parts) == 5 and parts[0] == "v6" and parts[2] == "pair":
+            src, dst = parts[3], parts[4]
+            if src not in USD_RATES or dst not in USD_RATES:
+                return 404, {"result": "error", "error-type": "unsupported-code"}
+            return 200, {"result": "success", "conversion_rate": USD_RATES[dst] / USD_RATES[src]}
+        # /data/2.5/weather?q={cidade}
+        if parts[-1:] == ["weather"]:
+            city = parse_qs(url.query).get("q", [""])[0]
+            return 200, {
+                "cod": 200,
+                "name": city.title(),
+                "main": {"temp": 25.3, "humidity": 65},
+                "weather": [{"description": "céu limpo", "icon": "01d"}],
+                "wind": {"speed": 3.4},
+                "sys": {"sunrise": 1700000000, "sunset": 1700045000}
+            }
+        return 404, {"cod": "404", "message": "not found"}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,14 +1,19 @@
-import mysql.connector
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'user': os.getenv('DB_USER', 'cerebro_user'),
+    'password': os.getenv('DB_PASSWORD', '2808'),
+    'database': os.getenv('DB_NAME', 'segundo_cerebro'),
+    'auth_plugin': 'mysql_native_password'
+}
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+
 def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv('DB_HOST', 'localhost'),
-        user=os.getenv('DB_USER', 'cerebro_user'),
-        password=os.getenv('DB_PASSWORD', '2808'),
-        database=os.getenv('DB_NAME', 'segundo_cerebro'),
-        auth_plugin='mysql_native_password'
-    )
\ No newline at end of file
+    # Mantido por compatibilidade: usa o pool compartilhado de database.db
+    from database.db import get_connection
+    return get_connection()
@@ -1,15 +1,63 @@
 # integração do Banco de Dados com o Python
 
-import mysql.connector # Importa o módulo mysql.connector para conectar ao MySQL
-from dotenv import load_dotenv # Importa o módulo load_dotenv para carregar variáveis de ambiente
-import os # Importa o módulo os para acessar variáveis de ambiente
-
-load_dotenv()  # Carregar as variáveis de ambiente do arquivo .env
-
-def get_connection():
-    return mysql.connector.connect(
-        host=os.getenv('DB_HOST'),  # Obtém o host do banco de dados do arquivo .env
-        user=os.getenv('DB_USER'),  # Obtém o usuário do banco de dados do arquivo .env
-        password=os.getenv('DB_PASSWORD'),  # Obtém a senha do banco de dados do arquivo .env
-        database=os.getenv('DB_NAME')  # Obtém o nome do banco de dados do arquivo .env
-    )
\ No newline at end of file
+import threading # Importa o módulo threading para proteger a criação do pool
+import time # Importa o módulo time para aguardar conexões livres
+from contextlib import contextmanager # Importa contextmanager para o empréstimo de conexões
+from config.dbconfig import DB_CONFIG, DB_POOL_SIZE # Importa as configurações do banco
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Retorna o pool de conexões compartilhado, criando-o na primeira chamada"""
+    global _pool
+    from mysql.connector import pooling # Importado no primeiro uso para acelerar a inicialização
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name="segundo_cerebro",
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    **DB_CONFIG
+                )
+    return _pool
+
+def get_connection(timeout: float = 5.0):
+    """Empresta uma conexão do pool; chame close() para devolvê-la"""
+    from mysql.connector import errors
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = get_pool().get_connection()
+            break
+        except errors.PoolError:
+            # Pool esgotado: aguarda uma conexão ser devolvida
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+    
+    # Verifica a saúde da conexão e reconecta se o servidor a derrubou
+    try:
+        conn.ping(reconnect=True, attempts=2, delay=0)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+@contextmanager
+def connection():
+    """Context manager que empresta uma conexão e a devolve ao pool ao final"""
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def is_available() -> bool:
+    """Indica se o banco de dados está acessível"""
+    try:
+        with connection():
+            return True
+    except Exception:
+        return False
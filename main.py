@@ -1,18 +1,170 @@
+import time
+_START_TIME = time.perf_counter()
+
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import requests
-from io import BytesIO
-import mysql.connector
 from datetime import datetime
 from dotenv import load_dotenv
+import itertools
+import json
+import math
 import os
-from modules.moedas import CurrencyConverter
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from modules.componentes import ChartView, RecyclingTable, VirtualTable
+from modules import metricas
+from modules.coalescencia import Debouncer
+from modules.agendador import RefreshScheduler
+from modules.estado import load_state, save_state
+from modules.busca import SearchIndex
+
+# Módulos pesados (requests, mysql.connector) são importados no primeiro uso
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
+class BackgroundWorker:
+    """Executa tarefas bloqueantes fora da thread da interface"""
+
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, root, max_workers: int = 4):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="segundo-cerebro")
+        self._results = queue.Queue()
+        self._generations = {}
+        self._running = True
+        self.root.after(self.POLL_INTERVAL_MS, self._drain)
+
+    def submit(self, key: str, func, on_success, on_error=None, *args, **kwargs):
+        """Agenda func em segundo plano; só a chamada mais recente de cada chave é entregue"""
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+
+        def task():
+            try:
+                result = func(*args, **kwargs)
+                self._results.put((key, generation, on_success, result))
+            except Exception as e:
+                if not on_error:
+                    print(f"Erro em tarefa de segundo plano ({key}): {e}")
+                self._results.put((key, generation, on_error, e))
+
+        return self.executor.submit(task)
+
+    def post(self, callback, value):
+        """Entrega callback(value) na thread da interface; pode ser chamado de qualquer thread"""
+        self._results.put((None, None, callback, value))
+
+    def _drain(self):
+        """Entrega os resultados na thread da interface, descartando respostas obsoletas"""
+        while True:
+            try:
+                key, generation, callback, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if key is not None:
+                if self._generations.get(key) != generation:
+                    continue
+                del self._generations[key]
+            if callback is None:
+                continue
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Erro ao atualizar interface ({key}): {e}")
+        if self._running:
+            self.root.after(self.POLL_INTERVAL_MS, self._drain)
+
+    def shutdown(self):
+        """Encerra o executor sem aguardar tarefas pendentes"""
+        self._running = False
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Store:
+    """Estado central observável da interface.
+
+    set() só publica quando o valor muda; os assinantes de cada chave são
+    chamados uma vez por quadro, numa única passada after_idle, com o valor
+    mais recente. Deve ser usado apenas na thread da interface.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._values = {}
+        self._subscribers = {}
+        self._dirty = {}
+        self._scheduled = False
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key, value, force: bool = False):
+        """Altera o valor da chave e agenda a notificação dos assinantes.
+
+        force notifica mesmo sem mudança (ex.: resposta a uma ação do usuário
+        que precisa substituir uma mensagem de "carregando").
+        """
+        if not force and key in self._values and self._values[key] == value:
+            return
+        self._values[key] = value
+        self._mark_dirty(key)
+
+    def delete(self, key):
+        """Remove a chave; os assinantes recebem None"""
+        if self._values.pop(key, None) is not None:
+            self._mark_dirty(key)
+
+    def subscribe(self, key, callback, initial: bool = True):
+        """Assina as mudanças da chave; retorna a função que cancela a assinatura"""
+        self._subscribers.setdefault(key, []).append(callback)
+        if initial and key in self._values:
+            callback(self._values[key])
+        
+        def unsubscribe():
+            callbacks = self._subscribers.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+        
+        return unsubscribe
+
+    def _mark_dirty(self, key):
+        self._dirty[key] = None
+        if not self._scheduled:
+            self._scheduled = True
+            self.root.after_idle(self._flush)
+
+    @metricas.timed("render_store")
+    def _flush(self):
+        """Entrega as mudanças acumuladas no quadro, uma vez por chave"""
+        self._scheduled = False
+        dirty, self._dirty = self._dirty, {}
+        for key in dirty:
+            value = self._values.get(key)
+            for callback in list(self._subscribers.get(key, ())):
+                try:
+                    callback(value)
+                except Exception as e:
+                    print(f"Erro ao atualizar interface ({key}): {e}")
+
+
 class SecondBrainApp:
-    def __init__(self):
+    TABS = ["Clima", "Tarefas", "Investimentos", "Moedas", "Busca"]
+    UPDATE_KINDS = ["clima", "tarefas", "investimentos", "moedas"]
+    STATUS_KEYS = ["atualizado:clima", "atualizado:tarefas", "banco", "metricas"]
+    STATUS_METRICS = ["cambio", "clima", "salvar_historico", "render_historico"]
+    METRICS_REFRESH_MS = 2000
+    METRICS_EXPORT_EVERY = 15  # ciclos de atualização entre exportações
+    STALE_REFRESH_DELAY_MS = 100  # atualiza o estado salvo logo após a primeira pintura
+    SUMMARY_REFRESH_MS = 5000  # intervalo mínimo entre consultas do resumo de conversões
+
+    def __init__(self, lazy: bool = None):
+        # Modo preguiçoso: abas montadas na primeira seleção (LAZY_STARTUP=0 desativa)
+        self.lazy = lazy if lazy is not None else os.getenv("LAZY_STARTUP", "1") != "0"
+        self.startup_metrics = {}
+        self.metrics_file = os.getenv("METRICS_FILE")
+        self._metrics_ticks = 0
+        
         # Configuração inicial
         self.root = ctk.CTk()
         self.root.title("Segundo Cérebro - Dashboard Completo")
@@ -22,61 +174,117 @@ class SecondBrainApp:
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
         
-        # Conexão com o banco de dados
-        self.db_connection = self.create_db_connection()
-        self.currency_converter = CurrencyConverter()
+        # Conexão com o banco de dados (verificada em segundo plano)
+        self.db_available = None
+        self._currency_converter = None
+        self._task_manager = None
+        self._investment_manager = None
+        self._note_manager = None
+        self._task_requests = 0
+        self._note_requests = 0
+        self.task_widgets = {}
+        self.worker = BackgroundWorker(self.root)
+        # Estado central: cada widget assina só as chaves que exibe
+        self.store = Store(self.root)
+        self._status_text = None
+        self._summary_refresh_pending = False
+        self._local_history_ids = itertools.count(-1, -1)
+        self.weather_debouncer = Debouncer(self.root, delay_ms=400)
+        self.multi_weather_debouncer = Debouncer(self.root, delay_ms=400)
+        self.conversion_debouncer = Debouncer(self.root, delay_ms=400)
+        self.search_debouncer = Debouncer(self.root, delay_ms=120)
         
-        # Dados iniciais
-        self.current_city = None
-        self.last_updates = {
-            'clima': None,
-            'tarefas': None,
-            'investimentos': None,
-            'moedas': None
-        }
+        # Índice de busca em memória, mantido a cada alteração
+        self.search_index = SearchIndex()
+        self._search_index_requested = False
+        
+        # Pré-busca em segundo plano, limitada pela cota diária de cada API
+        self.scheduler = RefreshScheduler(on_refresh=self.on_prefetched)
+        
+        # Último estado salvo: pintado na abertura e marcado como desatualizado
+        self.state_file = os.getenv("DASHBOARD_STATE_FILE", "estado_dashboard.json")
+        saved = load_state(self.state_file) if self.state_file else {}
+        saved_updates = saved.get('last_updates', {})
+        for kind in self.UPDATE_KINDS:
+            self.store.set(f"atualizado:{kind}", saved_updates.get(kind))
+        self.stale = {kind for kind in self.UPDATE_KINDS if saved_updates.get(kind)}
+        self.current_city = saved.get('cidade_atual')
+        if saved.get('clima'):
+            self.store.set("clima", {**saved['clima'], 'salvo': True})
+        if saved.get('conversao'):
+            self.store.set("conversao", {**saved['conversao'], 'salvo': True})
+        self.multi_weather = saved.get('clima_cidades', {})  # cidade normalizada -> [cidade, dados]
+        self.saved_history = saved.get('historico', [])
         
         # Interface principal
         self.setup_ui()
+        self.worker.submit("banco", self.check_database, self.on_database_checked)
 
-    def create_db_connection(self):
-        """Cria conexão com o MySQL"""
-        try:
-            return mysql.connector.connect(
-                host=os.getenv('DB_HOST'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_NAME')
-            )
-        except Exception as e:
-            print(f"Erro ao conectar ao banco: {e}")
-            return None
+    @property
+    def currency_converter(self):
+        """Conversor de moedas, criado no primeiro uso"""
+        if self._currency_converter is None:
+            from modules.moedas import CurrencyConverter
+            self._currency_converter = CurrencyConverter()
+        return self._currency_converter
+
+    def check_database(self):
+        """Verifica se o banco está acessível (executado em segundo plano)"""
+        from database import db
+        return db.is_available()
+
+    def on_database_checked(self, available):
+        self.db_available = available
+        self.store.set("banco", available)
 
     def setup_ui(self):
         """Configura a interface principal"""
         # Tabview (Abas principais)
-        self.tabview = ctk.CTkTabview(self.root)
+        self.tabview = ctk.CTkTabview(self.root, command=self.on_tab_selected)
         self.tabview.pack(fill="both", expand=True, padx=10, pady=10)
         
         # Adiciona as abas
-        self.tabview.add("Clima")
-        self.tabview.add("Tarefas")
-        self.tabview.add("Investimentos")
-        self.tabview.add("Moedas")
+        for name in self.TABS:
+            self.tabview.add(name)
         
-        # Configura cada aba
-        self.setup_clima_tab()
-        self.setup_tarefas_tab()
-        self.setup_investimentos_tab()
-        self.setup_moedas_tab()
+        # Configura as abas (no modo preguiçoso, só a aba visível)
+        self._built_tabs = set()
+        if self.lazy:
+            self.build_tab(self.tabview.get())
+        else:
+            for name in self.TABS:
+                self.build_tab(name)
         
         # Status bar
         self.status_bar = ctk.CTkLabel(
             self.root,
-            text="Sistema iniciado | Banco de dados: " + 
-                 ("Conectado" if self.db_connection else "Desconectado"),
+            text="Sistema iniciado | Banco de dados: Verificando...",
             font=("Arial", 10)
         )
         self.status_bar.pack(side="bottom", fill="x", pady=5)
+        for key in self.STATUS_KEYS:
+            self.store.subscribe(key, lambda _: self.update_status_bar(), initial=False)
+        if self.stale:
+            self.update_status_bar()
+
+    def build_tab(self, name):
+        """Monta a aba na primeira vez em que é necessária"""
+        if name in self._built_tabs:
+            return
+        self._built_tabs.add(name)
+        started = time.perf_counter()
+        {
+            "Clima": self.setup_clima_tab,
+            "Tarefas": self.setup_tarefas_tab,
+            "Investimentos": self.setup_investimentos_tab,
+            "Moedas": self.setup_moedas_tab,
+            "Busca": self.setup_busca_tab
+        }[name]()
+        self.startup_metrics[f"aba_{name.lower()}_ms"] = (time.perf_counter() - started) * 1000
+
+    def on_tab_selected(self):
+        """Monta a aba selecionada, se ainda não foi montada"""
+        self.build_tab(self.tabview.get())
 
     # ================== ABA CLIMA ==================
     def setup_clima_tab(self):
@@ -97,7 +305,7 @@ class SecondBrainApp:
         ctk.CTkButton(
             input_frame,
             text="Buscar",
-            command=self.update_weather
+            command=lambda: self.weather_debouncer(self.update_weather)
         ).pack(side="left")
         
         # Display do clima
@@ -115,6 +323,10 @@ class SecondBrainApp:
         self.weather_icon = ctk.CTkLabel(left_col, text="🌤️", font=("Arial", 80))
         self.weather_icon.pack(pady=20)
         
+        # Mensagens de busca e erro, separadas dos dados exibidos
+        self.weather_status = ctk.CTkLabel(right_col, text="", font=("Arial", 12), text_color="gray")
+        self.weather_status.pack(anchor="w", pady=(20, 0))
+        
         # Dados climáticos
         self.weather_info = ctk.CTkLabel(
             right_col,
@@ -123,7 +335,7 @@ class SecondBrainApp:
             justify="left",
             wraplength=400
         )
-        self.weather_info.pack(anchor="w", pady=20)
+        self.weather_info.pack(anchor="w", pady=(0, 20))
         
         # Detalhes extras
         self.weather_details = ctk.CTkLabel(
@@ -133,37 +345,147 @@ class SecondBrainApp:
             justify="left"
         )
         self.weather_details.pack(anchor="w")
+        
+        # Várias cidades
+        multi_frame = ctk.CTkFrame(tab)
+        multi_frame.pack(fill="x", pady=10)
+        
+        self.multi_city_entry = ctk.CTkEntry(
+            multi_frame,
+            placeholder_text="Várias cidades, separadas por vírgula...",
+            width=400
+        )
+        self.multi_city_entry.pack(side="left", padx=5)
+        
+        ctk.CTkButton(
+            multi_frame,
+            text="Buscar várias",
+            command=lambda: self.multi_weather_debouncer(self.update_multi_weather)
+        ).pack(side="left")
+        
+        self.multi_weather_frame = ctk.CTkScrollableFrame(tab, height=140)
+        self.multi_weather_frame.pack(fill="both", expand=True)
+        self.multi_weather_rows = {}
+        
+        # Exibe o clima do estado central (o salvo é atualizado logo após a primeira pintura)
+        self.store.subscribe("clima", self.display_weather_data)
+        if self.current_city:
+            self.clima_entry.insert(0, self.current_city)
+            self.root.after(self.STALE_REFRESH_DELAY_MS, self.request_weather, self.current_city)
+        if self.multi_weather:
+            self.multi_city_entry.insert(0, ", ".join(city for city, _ in self.multi_weather.values()))
+            for key, (city, _) in self.multi_weather.items():
+                self.create_city_row(key, city)
+            self.root.after(self.STALE_REFRESH_DELAY_MS, self.update_multi_weather)
 
     def update_weather(self):
         """Atualiza os dados climáticos"""
         city = self.clima_entry.get().strip()
         if not city:
-            self.weather_info.configure(text="Digite uma cidade válida", text_color="red")
+            self.weather_status.configure(text="Digite uma cidade válida", text_color="red")
             return
         
-        try:
-            # Simulação de dados - substitua pela sua API real
-            weather_data = {
-                'cidade': city,
-                'temperatura': 25.3,
-                'descricao': "Céu limpo",
-                'umidade': 65,
-                'vento': 12.4,
-                'nascer_do_sol': "06:15",
-                'por_do_sol': "18:45",
-                'icone': "01d"
-            }
-            
-            # Atualiza UI
-            self.display_weather_data(weather_data)
-            self.last_updates['clima'] = datetime.now().strftime("%H:%M:%S")
-            self.update_status_bar()
-            
-        except Exception as e:
-            self.weather_info.configure(text=f"Erro: {str(e)}", text_color="red")
+        self.weather_status.configure(text=f"Buscando clima de {city}...", text_color="gray")
+        self.request_weather(city)
+
+    def request_weather(self, city):
+        """Busca o clima da cidade em segundo plano"""
+        self.current_city = city
+        self.schedule_weather_prefetch(city)
+        self.worker.submit(
+            "clima",
+            self.fetch_weather,
+            self.on_weather_loaded,
+            self.on_weather_error,
+            city
+        )
+
+    def fetch_weather(self, city):
+        """Obtém os dados climáticos (executado em segundo plano)"""
+        from modules.clima import get_weather
+        return get_weather(city)
+
+    def on_weather_loaded(self, weather_data):
+        """Atualiza a interface com o clima obtido"""
+        if 'error' in weather_data:
+            self.on_weather_error(weather_data['error'])
+            return
+        
+        self.weather_status.configure(text="")
+        self.store.set("clima", weather_data)
+        self.mark_updated('clima')
+
+    def update_multi_weather(self):
+        """Busca várias cidades em paralelo, preenchendo cada linha ao chegar"""
+        from modules.clima import get_weather_many, normalize_city
+        cities = [c.strip() for c in self.multi_city_entry.get().split(",") if c.strip()]
+        if not cities:
+            return
+        
+        # Uma linha por cidade (sem repetições), marcada como pendente
+        for row in self.multi_weather_rows.values():
+            row.destroy()
+        self.multi_weather_rows = {}
+        keys = {}
+        for city in cities:
+            keys.setdefault(normalize_city(city), city)
+        self.multi_weather = {key: self.multi_weather[key] for key in keys if key in self.multi_weather}
+        for key, city in keys.items():
+            self.create_city_row(key, city)
+        
+        self._multi_weather_batch = getattr(self, "_multi_weather_batch", 0) + 1
+        batch = self._multi_weather_batch
+        
+        def fetch_all():
+            for city, data in get_weather_many(cities):
+                self.worker.post(lambda item: self.on_city_weather(batch, *item), (city, data))
+        
+        self.worker.submit("clima-varias", fetch_all, None)
+
+    def create_city_row(self, key, city):
+        """Cria a linha de uma cidade: pendente, ou com o último clima conhecido"""
+        saved = self.multi_weather.get(key)
+        if saved:
+            text = f"{self.format_city_weather(city, saved[1])} (atualizando...)"
+        else:
+            text = f"📍 {city}: buscando..."
+        row = ctk.CTkLabel(self.multi_weather_frame, text=text, text_color="gray", anchor="w")
+        row.pack(fill="x", padx=5, pady=1)
+        self.multi_weather_rows[key] = row
+
+    def format_city_weather(self, city, data):
+        return (
+            f"📍 {data.get('cidade', city)}: {data.get('temperatura', 'N/A')}°C | "
+            f"💧 {data.get('umidade', 'N/A')}% | {data.get('descricao', 'N/A')}"
+        )
+
+    def on_city_weather(self, batch, city, data):
+        """Preenche a linha de uma cidade (ignora resultados de buscas anteriores)"""
+        from modules.clima import normalize_city
+        if batch != self._multi_weather_batch:
+            return
+        key = normalize_city(city)
+        row = self.multi_weather_rows.get(key)
+        if row is None:
+            return
+        if 'error' in data:
+            row.configure(text=f"📍 {city}: erro - {data['error']}", text_color="red")
+            return
+        text = self.format_city_weather(city, data)
+        if data.get('desatualizado'):
+            text += " (desatualizado)"
+        row.configure(text=text, text_color="white")
+        self.multi_weather[key] = [city, data]
+        self.schedule_weather_prefetch(city)
+
+    def on_weather_error(self, error):
+        """Exibe falha na busca do clima"""
+        self.weather_status.configure(text=f"Erro: {str(error)}", text_color="red")
 
+    @metricas.timed("render_clima")
     def display_weather_data(self, data):
         """Exibe os dados climáticos na interface"""
+        saved = data.get('salvo')
         # Atualiza ícone
         self.update_weather_icon(data.get('icone', ''))
         
@@ -175,7 +497,11 @@ class SecondBrainApp:
             f"🌬 {data.get('vento', 'N/A')} m/s\n"
             f"📌 {data.get('descricao', 'N/A')}"
         )
-        self.weather_info.configure(text=main_info, text_color="white")
+        if saved:
+            main_info += f"\n⏳ Dados salvos às {self.store.get('atualizado:clima') or 'N/A'}, atualizando..."
+        elif data.get('desatualizado'):
+            main_info += "\n⚠ Serviço indisponível: exibindo o último dado conhecido"
+        self.weather_info.configure(text=main_info, text_color="gray" if saved else "white")
         
         # Detalhes extras
         details = (
@@ -218,45 +544,75 @@ class SecondBrainApp:
         # Carrega tarefas iniciais
         self.load_tasks()
 
+    @property
+    def task_manager(self):
+        """Gerenciador de tarefas, criado no primeiro uso"""
+        if self._task_manager is None:
+            from modules.tarefas import TaskManager
+            self._task_manager = TaskManager()
+        return self._task_manager
+
     def add_task(self):
         """Adiciona uma nova tarefa"""
         task_text = self.tarefa_entry.get().strip()
         if not task_text:
             return
         
-        # Aqui você implementaria a lógica para salvar no banco de dados
-        print(f"Tarefa adicionada: {task_text}")
         self.tarefa_entry.delete(0, "end")
-        self.load_tasks()
+        self.worker.submit(
+            self.task_mutation_key("nova"),
+            self.task_manager.add,
+            self.on_task_added,
+            None,
+            task_text
+        )
+
+    def task_mutation_key(self, action: str) -> str:
+        """Chave única por alteração: gravações nunca descartam o resultado umas das outras"""
+        self._task_requests += 1
+        return f"tarefa-{action}-{self._task_requests}"
+
+    def on_task_added(self, task):
+        """Cria apenas o widget da tarefa inserida"""
+        if task is None:
+            return
+        self.store.set(f"tarefa:{task['id']}", task)
+        self.create_task_widget(task)
+        self.index_task(task)
+        self.mark_tasks_updated()
 
     def load_tasks(self):
-        """Carrega as tarefas do banco de dados"""
-        # Limpa tarefas existentes
+        """Carrega as tarefas do banco de dados em segundo plano"""
+        self.worker.submit("tarefas", self.task_manager.load, self.render_tasks)
+
+    @metricas.timed("render_tarefas")
+    def render_tasks(self, tasks):
+        """Desenha a lista completa de tarefas (usado só na carga inicial)"""
         for widget in self.tasks_frame.winfo_children():
             widget.destroy()
+        for widgets in self.task_widgets.values():
+            widgets[3]()
+        self.task_widgets = {}
         
-        # Simulação de dados - substitua pelo seu código real
-        sample_tasks = [
-            {"id": 1, "texto": "Reunião com equipe", "concluida": False},
-            {"id": 2, "texto": "Fazer compras", "concluida": True},
-            {"id": 3, "texto": "Estudar Python", "concluida": False}
-        ]
-        
-        for task in sample_tasks:
+        for task in tasks:
+            self.store.set(f"tarefa:{task['id']}", task)
             self.create_task_widget(task)
+            self.index_task(task)
+        self.mark_tasks_updated()
 
     def create_task_widget(self, task):
-        """Cria um widget de tarefa na interface"""
+        """Cria um widget de tarefa que acompanha a chave da tarefa no estado central"""
         frame = ctk.CTkFrame(self.tasks_frame)
         frame.pack(fill="x", pady=2)
         
         # Checkbox
-        ctk.CTkCheckBox(
+        checkbox = ctk.CTkCheckBox(
             frame,
             text="",
             width=30,
-            command=lambda: self.toggle_task(task['id'])
-        ).pack(side="left", padx=5)
+            command=lambda: self.toggle_task(task['id'], checkbox.get())
+        )
+        checkbox.pack(side="left", padx=5)
         
         # Texto da tarefa
         task_text = ctk.CTkLabel(
@@ -277,23 +633,92 @@ class SecondBrainApp:
             command=lambda: self.delete_task(task['id'])
         ).pack(side="right", padx=5)
         
+        task_id = task['id']
+        unsubscribe = self.store.subscribe(
+            f"tarefa:{task_id}",
+            lambda current: self.on_task_changed(task_id, current),
+            initial=False
+        )
+        self.task_widgets[task_id] = (frame, checkbox, task_text, unsubscribe)
+        self.update_task_widget(task)
+
+    def on_task_changed(self, task_id, task):
+        """Atualiza ou remove o widget quando a tarefa muda no estado central"""
+        if task is not None:
+            self.update_task_widget(task)
+            return
+        widgets = self.task_widgets.pop(task_id, None)
+        if widgets:
+            widgets[0].destroy()
+            widgets[3]()
+
+    def update_task_widget(self, task):
+        """Aplica o status da tarefa somente ao seu widget"""
+        widgets = self.task_widgets.get(task['id'])
+        if widgets is None:
+            return
+        _, checkbox, task_text, _ = widgets
+        
         # Estilo para tarefas concluídas
         if task['concluida']:
+            checkbox.select()
             task_text.configure(text_color="#aaaaaa")
+        else:
+            checkbox.deselect()
+            task_text.configure(text_color=ctk.ThemeManager.theme["CTkLabel"]["text_color"])
 
-    def toggle_task(self, task_id):
-        """Alterna o status da tarefa"""
-        print(f"Alternando tarefa {task_id}")
-        self.load_tasks()
+    def toggle_task(self, task_id, done):
+        """Grava o status mostrado no checkbox (o alvo do clique, não uma inversão)"""
+        self.worker.submit(
+            self.task_mutation_key("status"),
+            self.task_manager.set_done,
+            lambda task: self.on_task_toggled(task_id, task),
+            lambda error: self.on_task_toggle_failed(task_id, error),
+            task_id,
+            bool(done)
+        )
+
+    def on_task_toggle_failed(self, task_id, error=None):
+        """A gravação falhou: o checkbox volta ao status do modelo"""
+        if error is not None:
+            print(f"Erro ao atualizar tarefa: {error}")
+        current = self.store.get(f"tarefa:{task_id}")
+        if current is not None:
+            self.update_task_widget(current)
+
+    def on_task_toggled(self, task_id, task):
+        if task is None:
+            self.on_task_toggle_failed(task_id)
+            return
+        self.store.set(f"tarefa:{task['id']}", task)
+        self.index_task(task)
+        self.mark_tasks_updated()
 
     def delete_task(self, task_id):
         """Remove uma tarefa"""
-        print(f"Removendo tarefa {task_id}")
-        self.load_tasks()
+        self.worker.submit(
+            self.task_mutation_key("remover"),
+            self.task_manager.delete,
+            lambda removed: self.on_task_deleted(task_id, removed),
+            None,
+            task_id
+        )
+
+    def on_task_deleted(self, task_id, removed):
+        """Remove a tarefa do estado central; só o widget dela é destruído"""
+        if not removed:
+            return
+        self.store.delete(f"tarefa:{task_id}")
+        self.search_index.remove(("tarefa", task_id))
+        self.mark_tasks_updated()
+
+    def mark_tasks_updated(self):
+        self.mark_updated('tarefas')
 
     # ================== ABA INVESTIMENTOS ==================
     def setup_investimentos_tab(self):
         """Configura a aba de investimentos"""
+        from modules.moedas import SUPPORTED_CURRENCIES
         tab = self.tabview.tab("Investimentos")
         
         # Frame de entrada
@@ -305,10 +730,22 @@ class SecondBrainApp:
         self.ativo_entry = ctk.CTkEntry(input_frame, width=100)
         self.ativo_entry.pack(side="left", padx=5)
         
+        ctk.CTkLabel(input_frame, text="Qtd:").pack(side="left", padx=5)
+        self.quantidade_entry = ctk.CTkEntry(input_frame, width=70, placeholder_text="1")
+        self.quantidade_entry.pack(side="left", padx=5)
+        
         ctk.CTkLabel(input_frame, text="Valor:").pack(side="left", padx=5)
         self.valor_entry = ctk.CTkEntry(input_frame, width=100)
         self.valor_entry.pack(side="left", padx=5)
         
+        self.investimento_moeda = ctk.CTkComboBox(
+            input_frame,
+            values=SUPPORTED_CURRENCIES,
+            width=70
+        )
+        self.investimento_moeda.set("BRL")
+        self.investimento_moeda.pack(side="left", padx=5)
+        
         ctk.CTkButton(
             input_frame,
             text="Adicionar",
@@ -319,44 +756,146 @@ class SecondBrainApp:
         self.investments_frame = ctk.CTkFrame(tab)
         self.investments_frame.pack(fill="both", expand=True, pady=10)
         
-        # Placeholder para o gráfico
-        ctk.CTkLabel(
+        # Gráfico (carteira ou câmbio)
+        from modules.graficos import ChartRenderer, TimeSeries
+        self.chart_selector = ctk.CTkSegmentedButton(
+            self.investments_frame,
+            values=["Carteira", "USD→BRL"],
+            command=self.on_chart_selected
+        )
+        self.chart_selector.set("Carteira")
+        self.chart_selector.pack(pady=(10, 0))
+        
+        self.chart_view = ChartView(self.investments_frame, ChartRenderer(), height=220)
+        self.chart_view.pack(fill="x", padx=10, pady=10)
+        self.rate_series = TimeSeries("cambio USD/BRL")
+        
+        # Resumo da carteira
+        self.portfolio_summary = ctk.CTkLabel(
             self.investments_frame,
-            text="Gráfico de Investimentos (será implementado)",
-            font=("Arial", 14)
-        ).pack(pady=50)
+            text="Carregando carteira...",
+            font=("Arial", 14, "bold")
+        )
+        self.portfolio_summary.pack(pady=5)
         
         # Lista de investimentos
+        self.investments_table = RecyclingTable(
+            self.investments_frame,
+            headers=["Ativo", "Moeda", "Valor (BRL)", "Alocação", "P&L"],
+            widths=[100, 70, 120, 90, 120],
+            max_rows=15,
+            empty_text="Nenhum investimento registrado ainda"
+        )
+        self.store.subscribe("carteira", self.render_investments)
         self.load_investments()
 
+    @property
+    def investment_manager(self):
+        """Gerenciador da carteira, criado no primeiro uso"""
+        if self._investment_manager is None:
+            from modules.investimentos import InvestmentManager
+            self._investment_manager = InvestmentManager("BRL")
+        return self._investment_manager
+
     def add_investment(self):
         """Adiciona um novo investimento"""
-        ativo = self.ativo_entry.get().strip()
+        ativo = self.ativo_entry.get().strip().upper()
         valor = self.valor_entry.get().strip()
+        quantidade = self.quantidade_entry.get().strip() or "1"
+        moeda = self.investimento_moeda.get()
         
         if not ativo or not valor:
             return
         
-        # Aqui você implementaria a lógica para salvar no banco de dados
-        print(f"Investimento adicionado: {ativo} - R${valor}")
+        try:
+            valor = float(valor.replace(",", "."))
+            quantidade = float(quantidade.replace(",", "."))
+        except ValueError:
+            self.portfolio_summary.configure(text="Erro: valor e quantidade devem ser numéricos", text_color="red")
+            return
+        
         self.ativo_entry.delete(0, "end")
         self.valor_entry.delete(0, "end")
-        self.load_investments()
+        self.quantidade_entry.delete(0, "end")
+        
+        converter = self.currency_converter
+        manager = self.investment_manager
+        
+        def add_and_valuate():
+            manager.add(ativo, quantidade, valor, moeda, converter)
+            return manager.valuate(converter)
+        
+        self.worker.submit("investimentos", add_and_valuate, self.on_investments_loaded, self.on_investments_error)
 
     def load_investments(self):
-        """Carrega os investimentos do banco de dados"""
-        # Simulação de dados
-        sample_data = [
-            {"id": 1, "ativo": "PETR4", "valor": 1500.00},
-            {"id": 2, "ativo": "BTC", "valor": 3200.50},
-            {"id": 3, "ativo": "IVVB11", "valor": 245.75}
-        ]
+        """Carrega os investimentos do banco de dados e avalia a carteira"""
+        converter = self.currency_converter
+        manager = self.investment_manager
+        
+        def load_and_valuate():
+            manager.load()
+            return manager.valuate(converter)
+        
+        self.worker.submit("investimentos", load_and_valuate, self.on_investments_loaded, self.on_investments_error)
+
+    def on_investments_loaded(self, valuation):
+        """Publica a avaliação; a tabela só é redesenhada se ela mudou"""
+        self.store.set("carteira", valuation)
+        self.mark_updated('investimentos')
+        if self.chart_selector.get() == "Carteira":
+            # A série ganha um ponto a cada avaliação; o ChartView só redesenha se mudou
+            self.chart_view.show(self.investment_manager.value_series)
+
+    @metricas.timed("render_investimentos")
+    def render_investments(self, valuation):
+        """Exibe o resumo e a alocação da carteira"""
+        pnl_color = "#44bb44" if valuation['pnl'] >= 0 else "#ff4444"
+        summary = (
+            f"Total: {valuation['valor_total']:,.2f} {valuation['moeda']} | "
+            f"P&L: {valuation['pnl']:+,.2f} ({valuation['pnl_pct']:+.2f}%)"
+        )
+        if valuation['sem_taxa']:
+            summary += f" | Sem taxa: {', '.join(valuation['sem_taxa'])}"
+        self.portfolio_summary.configure(text=summary, text_color=pnl_color)
         
-        # Aqui você implementaria a exibição real dos dados
+        self.investments_table.update([
+            (item['ativo'], [
+                item['ativo'],
+                item['moeda'],
+                f"{item['valor']:,.2f}",
+                f"{item['alocacao'] * 100:.1f}%",
+                f"{item['pnl']:+,.2f}"
+            ])
+            for item in valuation['ativos']
+        ])
+
+    def on_chart_selected(self, choice):
+        """Alterna o gráfico entre o valor da carteira e a série de câmbio"""
+        if choice == "Carteira":
+            self.chart_view.show(self.investment_manager.value_series)
+            return
+        
+        converter = self.currency_converter
+        
+        def load_rate_series():
+            x, y = converter.get_rate_series("USD", "BRL")
+            self.rate_series.replace(x, y)
+            return self.rate_series
+        
+        self.chart_view.show(self.rate_series)
+        self.worker.submit("grafico", load_rate_series, self.on_rate_series_loaded)
+
+    def on_rate_series_loaded(self, series):
+        if self.chart_selector.get() != "Carteira":
+            self.chart_view.show(series)
+
+    def on_investments_error(self, error):
+        self.portfolio_summary.configure(text=f"Erro: {error}", text_color="red")
 
     # ================== ABA MOEDAS ==================
     def setup_moedas_tab(self):
         """Configura a aba de conversão de moedas"""
+        from modules.moedas import SUPPORTED_CURRENCIES
         tab = self.tabview.tab("Moedas")
         
         # Frame de conversão
@@ -371,8 +910,9 @@ class SecondBrainApp:
         # Moeda de origem
         self.from_currency = ctk.CTkComboBox(
             conversion_frame,
-            values=["USD", "EUR", "GBP", "BRL", "JPY", "CAD", "AUD", "CHF"],
-            width=70
+            values=SUPPORTED_CURRENCIES,
+            width=70,
+            command=self.schedule_rate_prefetch
         )
         self.from_currency.set("USD")
         self.from_currency.pack(side="left", padx=5)
@@ -383,7 +923,7 @@ class SecondBrainApp:
         # Moeda de destino
         self.to_currency = ctk.CTkComboBox(
             conversion_frame,
-            values=["USD", "EUR", "GBP", "BRL", "JPY", "CAD", "AUD", "CHF"],
+            values=SUPPORTED_CURRENCIES,
             width=70
         )
         self.to_currency.set("BRL")
@@ -393,7 +933,7 @@ class SecondBrainApp:
         ctk.CTkButton(
             conversion_frame,
             text="Converter",
-            command=self.convert_currency
+            command=lambda: self.conversion_debouncer(self.convert_currency)
         ).pack(side="left", padx=10)
         
         # Resultado
@@ -404,21 +944,51 @@ class SecondBrainApp:
         )
         self.conversion_result.pack(pady=10)
         
+        # Resumo (lido só das tabelas de agregação)
+        self.conversion_summary = ctk.CTkLabel(
+            tab,
+            text="",
+            font=("Arial", 12),
+            text_color="gray"
+        )
+        self.conversion_summary.pack()
+        
         # Frame do histórico
         history_frame = ctk.CTkFrame(tab)
         history_frame.pack(fill="both", expand=True, padx=20, pady=10)
         
         ctk.CTkLabel(
             history_frame,
-            text="Últimas Conversões",
+            text="Histórico de Conversões",
             font=("Arial", 14, "bold")
         ).pack(pady=5)
         
-        self.history_table = ctk.CTkScrollableFrame(history_frame, height=150)
-        self.history_table.pack(fill="both", expand=True)
+        self.history_view = VirtualTable(
+            history_frame,
+            headers=["Data", "De", "Para", "Valor", "Resultado"],
+            widths=[120, 100, 100, 100, 100],
+            load_page=self.load_history_page,
+            format_row=self.format_history_row,
+            visible_rows=8,
+            page_size=50,
+            empty_text="Nenhuma conversão registrada ainda"
+        )
+        self.history_view.pack(fill="both", expand=True)
+        
+        # Resultado, resumo e novas linhas do histórico acompanham o estado central
+        self.store.subscribe("conversao", self.render_conversion)
+        self.store.subscribe("conversao", self.prepend_conversion, initial=False)
+        self.store.subscribe("conversao", self.index_conversion, initial=False)
+        self.store.subscribe("resumo", self.render_conversion_summary, initial=False)
+        
+        # Pinta o histórico salvo enquanto o banco responde
+        if self.saved_history:
+            self.history_view.show_rows(self.saved_history)
+            self.conversion_summary.configure(text="Histórico salvo da última sessão, atualizando...")
         
         # Carrega histórico inicial
         self.load_conversion_history()
+        self.schedule_rate_prefetch(self.from_currency.get())
 
     def convert_currency(self):
         """Realiza a conversão de moedas"""
@@ -428,107 +998,439 @@ class SecondBrainApp:
             from_curr = self.from_currency.get()
             to_curr = self.to_currency.get()
             
+            if not math.isfinite(amount):
+                raise ValueError("O valor deve ser um número finito")
             if amount <= 0:
                 raise ValueError("O valor deve ser positivo")
                 
-            # Realiza a conversão
-            result = self.currency_converter.convert_currency(amount, from_curr, to_curr)
-            
-            if "error" in result:
-                self.conversion_result.configure(
-                    text=f"Erro: {result['error']}",
-                    text_color="red"
-                )
-            else:
-                # Formata o resultado
-                formatted_result = (
-                    f"{result['original_amount']:.2f} {result['from_currency']} = "
-                    f"{result['converted_amount']:.2f} {result['to_currency']}\n"
-                    f"Taxa: 1 {result['from_currency']} = {result['rate']:.6f} {result['to_currency']}"
-                )
-                self.conversion_result.configure(
-                    text=formatted_result,
-                    text_color="white"
-                )
-                self.load_conversion_history()
-                
         except ValueError as e:
             self.conversion_result.configure(
                 text=f"Erro: {str(e)}",
                 text_color="red"
             )
-        except Exception as e:
+            return
+        
+        self.schedule_rate_prefetch(from_curr)
+        
+        # Realiza a conversão em segundo plano
+        self.conversion_result.configure(text="Convertendo...", text_color="gray")
+        self.worker.submit(
+            "moedas",
+            self.currency_converter.convert_currency,
+            self.on_conversion_done,
+            self.on_conversion_error,
+            amount, from_curr, to_curr
+        )
+
+    def on_conversion_done(self, result):
+        """Exibe o resultado da conversão"""
+        if "error" in result:
             self.conversion_result.configure(
-                text=f"Erro inesperado: {str(e)}",
+                text=f"Erro: {result['error']}",
                 text_color="red"
             )
+            return
+        
+        # Substitui o "Convertendo..." mesmo que o resultado seja idêntico ao anterior
+        self.store.set("conversao", result, force=True)
+        self.mark_updated('moedas')
+        self.schedule_summary_refresh()
+
+    def render_conversion(self, result):
+        """Exibe a última conversão (a da sessão anterior fica em cinza)"""
+        text = (
+            f"{result['original_amount']:.2f} {result['from_currency']} = "
+            f"{result['converted_amount']:.2f} {result['to_currency']}\n"
+            f"Taxa: 1 {result['from_currency']} = {result['rate']:.6f} {result['to_currency']}"
+        )
+        if result.get('salvo'):
+            text += "\n(última sessão)"
+        self.conversion_result.configure(text=text, text_color="gray" if result.get('salvo') else "white")
+
+    def prepend_conversion(self, result):
+        """Insere a nova conversão no topo do histórico, sem reconsultar o banco"""
+        if result.get('salvo'):
+            return
+        self.history_view.prepend([{
+            'id': next(self._local_history_ids),
+            'data_conversao': datetime.strptime(result['timestamp'], "%Y-%m-%d %H:%M:%S"),
+            'moeda_origem': result['from_currency'],
+            'moeda_destino': result['to_currency'],
+            'valor_origem': result['original_amount'],
+            'valor_convertido': result['converted_amount'],
+            'taxa_cambio': result['rate']
+        }])
+
+    def on_conversion_error(self, error):
+        """Exibe falha inesperada na conversão"""
+        self.conversion_result.configure(
+            text=f"Erro inesperado: {str(error)}",
+            text_color="red"
+        )
 
     def load_conversion_history(self):
-        """Carrega o histórico de conversões"""
-        # Limpa a tabela atual
-        for widget in self.history_table.winfo_children():
-            widget.destroy()
+        """Recarrega o histórico de conversões a partir da página mais recente"""
+        self.history_view.reset()
+        self.load_conversion_summary()
+
+    def load_conversion_summary(self):
+        """Consulta o resumo das agregações e o publica no estado central"""
+        self._summary_refresh_pending = False
+        self.worker.submit(
+            "resumo",
+            self.currency_converter.get_summary,
+            lambda summary: self.store.set("resumo", summary),
+            None,
+            30
+        )
+
+    def schedule_summary_refresh(self):
+        """Agrupa as consultas do resumo disparadas por conversões seguidas"""
+        if self._summary_refresh_pending:
+            return
+        self._summary_refresh_pending = True
+        self.root.after(self.SUMMARY_REFRESH_MS, self.load_conversion_summary)
+
+    def render_conversion_summary(self, summary):
+        """Exibe o resumo dos últimos dias no painel da aba Moedas"""
+        if not summary['conversoes']:
+            self.conversion_summary.configure(text="")
+            return
         
-        # Obtém os dados
-        history = self.currency_converter.get_conversion_history(limit=5)
+        text = f"Últimos {summary['dias']} dias: {summary['conversoes']} conversões em {summary['pares']} pares"
+        if summary['par_mais_usado']:
+            origem, destino = summary['par_mais_usado']
+            text += (
+                f" | Mais usado: {origem}→{destino} ({summary['conversoes_par']}x, "
+                f"taxa média {summary['taxa_media_par']:.4f})"
+            )
+        self.conversion_summary.configure(text=text)
+
+    def load_history_page(self, direction, cursor_row, callback):
+        """Busca uma página do histórico em segundo plano (paginação keyset)"""
+        cursor = None
+        if cursor_row is not None:
+            cursor = (cursor_row['data_conversao'], cursor_row['id'])
+        kwargs = {"before": cursor} if direction == "older" else {"after": cursor}
+        self.worker.submit(
+            "historico",
+            self.currency_converter.get_history_page,
+            metricas.timed("render_historico")(callback),
+            None,
+            self.history_view.page_size,
+            **kwargs
+        )
+
+    def format_history_row(self, item):
+        """Converte um registro do histórico em (chave, colunas) para a tabela"""
+        # Formata a data
+        conv_date = item['data_conversao'].strftime("%d/%m %H:%M")
+        
+        return item['id'], [
+            conv_date,
+            item['moeda_origem'],
+            item['moeda_destino'],
+            f"{item['valor_origem']:.2f}",
+            f"{item['valor_convertido']:.2f}"
+        ]
+
+    # ================== ABA BUSCA ==================
+    def setup_busca_tab(self):
+        """Configura a aba de busca e de notas"""
+        tab = self.tabview.tab("Busca")
+        
+        # Nova nota
+        note_frame = ctk.CTkFrame(tab)
+        note_frame.pack(pady=10, fill="x")
+        
+        self.nota_entry = ctk.CTkEntry(
+            note_frame,
+            placeholder_text="Nova nota...",
+            width=500
+        )
+        self.nota_entry.pack(side="left", padx=5)
+        
+        ctk.CTkButton(
+            note_frame,
+            text="Salvar nota",
+            command=self.add_note
+        ).pack(side="left")
+        
+        # Busca enquanto digita, direto no índice em memória
+        self.search_entry = ctk.CTkEntry(
+            tab,
+            placeholder_text="Buscar em tarefas, conversões e notas...",
+            width=500
+        )
+        self.search_entry.pack(pady=(10, 0), padx=5, anchor="w")
+        self.search_entry.bind("<KeyRelease>", lambda e: self.search_debouncer(self.run_search))
+        
+        self.search_info = ctk.CTkLabel(tab, text="Indexando...", text_color="gray")
+        self.search_info.pack(anchor="w", padx=5)
         
-        if not history:
-            ctk.CTkLabel(
-                self.history_table,
-                text="Nenhuma conversão registrada ainda",
-                text_color="gray"
-            ).pack()
+        results_frame = ctk.CTkFrame(tab)
+        results_frame.pack(fill="both", expand=True, pady=10)
+        self.search_results = RecyclingTable(
+            results_frame,
+            headers=["Tipo", "Texto", "Detalhe"],
+            widths=[90, 480, 150],
+            max_rows=15,
+            empty_text="Nenhum resultado"
+        )
+        self.load_search_index()
+
+    @property
+    def note_manager(self):
+        """Gerenciador de notas, criado no primeiro uso"""
+        if self._note_manager is None:
+            from modules.notas import NoteManager
+            self._note_manager = NoteManager()
+        return self._note_manager
+
+    def load_search_index(self):
+        """Indexa tarefas, notas e o histórico recente em segundo plano"""
+        if self._search_index_requested:
             return
+        self._search_index_requested = True
+        tasks = self.task_manager
+        notes = self.note_manager
+        converter = self.currency_converter
+        history_rows = int(os.getenv("SEARCH_HISTORY_ROWS", 5000))
         
-        # Cabeçalho
-        header_frame = ctk.CTkFrame(self.history_table)
-        header_frame.pack(fill="x")
-        
-        headers = ["Data", "De", "Para", "Valor", "Resultado"]
-        for i, header in enumerate(headers):
-            ctk.CTkLabel(
-                header_frame,
-                text=header,
-                font=("Arial", 12, "bold"),
-                width=100 if i > 0 else 120
-            ).pack(side="left", padx=2)
-        
-        # Dados
-        for item in history:
-            row_frame = ctk.CTkFrame(self.history_table)
-            row_frame.pack(fill="x", pady=1)
-            
-            # Formata a data
-            conv_date = item['data_conversao'].strftime("%d/%m %H:%M")
-            
-            # Adiciona as colunas
-            columns = [
-                conv_date,
-                item['moeda_origem'],
-                item['moeda_destino'],
-                f"{item['valor_origem']:.2f}",
-                f"{item['valor_convertido']:.2f}"
-            ]
-            
-            for i, col in enumerate(columns):
-                ctk.CTkLabel(
-                    row_frame,
-                    text=col,
-                    width=100 if i > 0 else 120
-                ).pack(side="left", padx=2)
+        def build():
+            # Tarefas já carregadas pela aba Tarefas não são buscadas de novo
+            for task in tasks.store.all() or tasks.load():
+                self.index_task(task)
+            for note in notes.load():
+                self.index_note(note)
+            # Mais antigas primeiro, para que as recentes ganhem os empates
+            for row in reversed(converter.get_history_page(history_rows)):
+                self.index_history_row(row)
+            return len(self.search_index)
+        
+        self.worker.submit("indice", build, self.on_search_index_built)
+
+    def on_search_index_built(self, count):
+        self.search_info.configure(text=f"{count} itens indexados")
+        if self.search_entry.get().strip():
+            self.run_search()
+
+    def index_task(self, task):
+        self.search_index.add(("tarefa", task['id']), task['texto'], {
+            "tipo": "Tarefa",
+            "texto": task['texto'],
+            "detalhe": "Concluída" if task['concluida'] else "Pendente"
+        })
+
+    def index_note(self, note):
+        created = note.get('criada_em') or datetime.now()
+        self.search_index.add(("nota", note['id']), note['texto'], {
+            "tipo": "Nota",
+            "texto": note['texto'],
+            "detalhe": created.strftime("%d/%m/%Y %H:%M")
+        })
+
+    def index_history_row(self, row):
+        moment = row['data_conversao']
+        self.search_index.add(
+            ("conversao", row['id']),
+            f"{row['moeda_origem']} {row['moeda_destino']} {row['valor_origem']:.2f} "
+            f"{row['valor_convertido']:.2f} {moment:%d/%m/%Y}",
+            {
+                "tipo": "Conversão",
+                "texto": (
+                    f"{row['valor_origem']:.2f} {row['moeda_origem']} → "
+                    f"{row['valor_convertido']:.2f} {row['moeda_destino']}"
+                ),
+                "detalhe": moment.strftime("%d/%m/%Y %H:%M")
+            }
+        )
+
+    def index_conversion(self, result):
+        """Indexa a conversão recém-feita; antes da carga inicial ela vem do banco"""
+        if result.get('salvo') or not self._search_index_requested:
+            return
+        self.index_history_row({
+            'id': next(self._local_history_ids),
+            'data_conversao': datetime.strptime(result['timestamp'], "%Y-%m-%d %H:%M:%S"),
+            'moeda_origem': result['from_currency'],
+            'moeda_destino': result['to_currency'],
+            'valor_origem': result['original_amount'],
+            'valor_convertido': result['converted_amount']
+        })
+
+    def add_note(self):
+        """Salva uma nota livre e a inclui no índice"""
+        text = self.nota_entry.get().strip()
+        if not text:
+            return
+        self.nota_entry.delete(0, "end")
+        self._note_requests += 1
+        self.worker.submit(
+            f"nota-nova-{self._note_requests}",
+            self.note_manager.add,
+            self.on_note_added,
+            None,
+            text
+        )
+
+    def on_note_added(self, note):
+        if note is None:
+            self.search_info.configure(text="Erro ao salvar a nota", text_color="red")
+            return
+        self.index_note(note)
+        self.search_info.configure(text=f"{len(self.search_index)} itens indexados", text_color="gray")
+        if self.search_entry.get().strip():
+            self.run_search()
+
+    @metricas.timed("render_busca")
+    def run_search(self):
+        """Consulta o índice e mostra os resultados mais relevantes"""
+        query = self.search_entry.get().strip()
+        if not query:
+            self.search_results.update([])
+            return
+        results = self.search_index.search(query, limit=self.search_results.max_rows)
+        self.search_results.update([
+            (doc_id, [data['tipo'], data['texto'], data['detalhe']])
+            for _, doc_id, data in results
+        ])
 
     # ================== FUNÇÕES GERAIS ==================
     def update_status_bar(self):
-        """Atualiza a barra de status"""
+        """Atualiza a barra de status, só tocando no widget se o texto mudou"""
         status_text = "Status: "
-        status_text += f"Clima: {self.last_updates['clima'] or 'N/A'} | "
-        status_text += f"Tarefas: {self.last_updates['tarefas'] or 'N/A'} | "
-        status_text += f"Banco: {'Conectado' if self.db_connection else 'Desconectado'}"
+        status_text += f"Clima: {self.format_update('clima')} | "
+        status_text += f"Tarefas: {self.format_update('tarefas')} | "
+        status_text += f"Banco: {self.database_status()}"
+        
+        summary = self.store.get("metricas")
+        if summary:
+            status_text += f" || {summary}"
         
-        self.status_bar.configure(text=status_text)
+        if status_text != self._status_text:
+            self._status_text = status_text
+            self.status_bar.configure(text=status_text)
+
+    def format_update(self, kind):
+        """Horário da última atualização, indicando se ainda é do estado salvo"""
+        value = self.store.get(f"atualizado:{kind}") or 'N/A'
+        return f"{value} (salvo)" if kind in self.stale else value
+
+    def mark_updated(self, kind):
+        """Registra dados novos de uma seção, que deixa de ser desatualizada"""
+        self.stale.discard(kind)
+        self.store.set(f"atualizado:{kind}", datetime.now().strftime("%H:%M:%S"), force=True)
+
+    @property
+    def last_updates(self):
+        """Horário da última atualização de cada seção"""
+        return {kind: self.store.get(f"atualizado:{kind}") for kind in self.UPDATE_KINDS}
+
+    def refresh_metrics(self):
+        """Publica o resumo de métricas para a barra de status e exporta snapshots"""
+        self.store.set("metricas", metricas.summary(self.STATUS_METRICS))
+        self._metrics_ticks += 1
+        if self.metrics_file and self._metrics_ticks % self.METRICS_EXPORT_EVERY == 0:
+            metricas.export(self.metrics_file)
+        self.root.after(self.METRICS_REFRESH_MS, self.refresh_metrics)
+
+    def schedule_rate_prefetch(self, base):
+        """Mantém a tabela de taxas da moeda de origem aquecida em segundo plano"""
+        from modules.moedas import quota_budget
+        converter = self.currency_converter
+        self.scheduler.register(
+            ("moedas", base),
+            lambda: converter.refresh_rates(base),
+            ttl=converter.rate_cache.ttl,
+            budget=quota_budget
+        )
+
+    def schedule_weather_prefetch(self, city):
+        """Mantém o clima de cidades consultadas recentemente aquecido"""
+        from modules.clima import WEATHER_CACHE_TTL, get_weather, normalize_city, quota_budget
+        self.scheduler.register(
+            ("clima", normalize_city(city)),
+            lambda: get_weather(city, use_cache=False),
+            ttl=WEATHER_CACHE_TTL,
+            budget=quota_budget
+        )
+
+    def on_prefetched(self, key, result):
+        """Chamado na thread do agendador após uma pré-busca"""
+        if isinstance(result, dict) and 'error' in result:
+            return
+        self.worker.post(lambda value: self.apply_prefetch(key, value), result)
+
+    def apply_prefetch(self, key, result):
+        """Publica o clima pré-buscado da cidade exibida e marca a seção como atualizada"""
+        kind = key[0]
+        if kind == "clima" and self.current_city:
+            from modules.clima import normalize_city
+            if normalize_city(self.current_city) == key[1]:
+                self.store.set("clima", result)
+        self.mark_updated(kind)
+
+    def database_status(self):
+        if self.db_available is None:
+            return "Verificando..."
+        return "Conectado" if self.db_available else "Desconectado"
+
+    def report_first_paint(self):
+        """Mede o tempo até a primeira pintura da janela e o reporta"""
+        self.root.update_idletasks()
+        elapsed_ms = (time.perf_counter() - _START_TIME) * 1000
+        self.startup_metrics["primeira_pintura_ms"] = elapsed_ms
+        self.startup_metrics["modo"] = "preguicoso" if self.lazy else "completo"
+        print(f"Tempo até a primeira pintura: {elapsed_ms:.1f} ms")
+        
+        budget = os.getenv("STARTUP_BUDGET_MS")
+        if budget and elapsed_ms > float(budget):
+            print(f"Aviso: inicialização acima do orçamento de {float(budget):.0f} ms")
+        
+        metrics_file = os.getenv("STARTUP_METRICS_FILE")
+        if metrics_file:
+            try:
+                with open(metrics_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"data": datetime.now().isoformat(), **self.startup_metrics}) + "\n")
+            except OSError as e:
+                print(f"Erro ao salvar métricas de inicialização: {e}")
+
+    def save_dashboard_state(self):
+        """Salva o último estado conhecido para pintar a próxima abertura"""
+        if not self.state_file:
+            return
+        history = self.saved_history
+        if "Moedas" in self._built_tabs and self.history_view.rows:
+            history = self.history_view.rows[:self.history_view.page_size]
+        weather = self.store.get("clima")
+        conversion = self.store.get("conversao")
+        save_state(self.state_file, {
+            "last_updates": self.last_updates,
+            "cidade_atual": self.current_city,
+            "clima": {k: v for k, v in weather.items() if k != 'salvo'} if weather else None,
+            "clima_cidades": self.multi_weather,
+            "conversao": {k: v for k, v in conversion.items() if k != 'salvo'} if conversion else None,
+            "historico": history
+        })
+
+    def on_close(self):
+        """Encerra os serviços em segundo plano e fecha a janela"""
+        self.save_dashboard_state()
+        self.scheduler.stop()
+        self.worker.shutdown()
+        if self.metrics_file:
+            metricas.export(self.metrics_file)
+        if self._currency_converter is not None:
+            self._currency_converter.close()
+        self.root.destroy()
 
     def run(self):
         """Inicia a aplicação"""
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after_idle(self.report_first_paint)
+        self.root.after(self.METRICS_REFRESH_MS, self.refresh_metrics)
+        self.scheduler.start()
         self.root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+
+class QuotaBudget:
+    """Orçamento diário de chamadas a uma API externa.
+
+    Com path, o uso do dia fica num SQLite local: reinícios do app e outros
+    processos (ex.: servidor.py) descontam da mesma cota. Se o arquivo falhar,
+    o contador em memória assume.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cota_api (
+            api TEXT PRIMARY KEY,
+            dia TEXT NOT NULL,
+            usado INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, daily_limit: int, name: str = None, path: str = None):
+        self.daily_limit = daily_limit
+        self.name = name
+        self._day = date.today()
+        self._used = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+                self._conn.executescript(self.SCHEMA)
+            except sqlite3.Error as e:
+                print(f"Erro ao abrir o arquivo de cotas {path}: {e}")
+                self._conn = None
+
+    def _rollover(self):
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+
+    def _reserve(self, amount: int) -> bool:
+        """Desconta amount chamadas se couberem (amount=0 só atualiza o uso)"""
+        self._rollover()
+        if self._conn is not None:
+            try:
+                return self._reserve_shared(amount)
+            except sqlite3.Error as e:
+                print(f"Erro ao atualizar a cota de {self.name}: {e}")
+        if self._used + amount > self.daily_limit:
+            return False
+        self._used += amount
+        return True
+
+    def _reserve_shared(self, amount: int) -> bool:
+        today = self._day.isoformat()
+        conn = self._conn
+        # BEGIN IMMEDIATE serializa leitura e escrita entre processos
+        conn.execute("BEGIN IMMEDIATE" if amount else "BEGIN")
+        try:
+            row = conn.execute("SELECT dia, usado FROM cota_api WHERE api = ?", (self.name,)).fetchone()
+            used = row[1] if row and row[0] == today else 0
+            fits = used + amount <= self.daily_limit
+            if fits and amount:
+                used += amount
+                conn.execute(
+                    """
+                    INSERT INTO cota_api (api, dia, usado) VALUES (?, ?, ?)
+                    ON CONFLICT (api) DO UPDATE SET dia = excluded.dia, usado = excluded.usado
+                    """,
+                    (self.name, today, used)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._used = used
+        return fits
+
+    def try_consume(self, amount: int = 1) -> bool:
+        """Reserva chamadas do orçamento; retorna False se ele estiver esgotado"""
+        with self._lock:
+            return self._reserve(amount)
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._reserve(0)
+            return max(self.daily_limit - self._used, 0)
+
+
+def seconds_left_today() -> float:
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds()
+
+
+class _Job:
+    def __init__(self, key, refresh, ttl, budget):
+        self.key = key
+        self.refresh = refresh
+        self.ttl = ttl
+        self.budget = budget
+        self.last_used = time.time()
+        self.uses = 1.0  # uso recente com decaimento exponencial
+        self.last_refresh = None
+        self.next_due = time.time() + ttl * 0.8
+
+
+class RefreshScheduler:
+    """Pré-busca dados antes de expirarem, com intervalo adaptado ao uso de
+    cada chave e limitado pelo orçamento diário de cada API"""
+
+    def __init__(self, min_interval: float = 60, max_interval: float = 3600,
+                 idle_after: float = 3600, drop_after: float = 86400,
+                 half_life: float = 1800, on_refresh=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_after = idle_after
+        self.drop_after = drop_after
+        self.half_life = half_life
+        self.on_refresh = on_refresh  # callback(chave, resultado), chamado na thread do agendador
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def register(self, key, refresh, ttl: float, budget: QuotaBudget):
+        """Passa a manter a chave atualizada (ou registra mais um uso dela)"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                self._jobs[key] = _Job(key, refresh, ttl, budget)
+                self._wakeup.set()
+                return
+        self.touch(key)
+
+    def touch(self, key):
+        """Registra um uso da chave, o que encurta seu intervalo de atualização"""
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                return
+            job.uses = self._decayed_uses(job, now) + 1
+            job.last_used = now
+            job.next_due = min(job.next_due, self._next_due(job, now))
+
+    def unregister(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._jobs)
+
+    def _decayed_uses(self, job, now) -> float:
+        return job.uses * 0.5 ** ((now - job.last_used) / self.half_life)
+
+    def interval(self, job, now: float = None) -> float:
+        """Intervalo até a próxima atualização da chave"""
+        now = now or time.time()
+        idle = now - job.last_used
+        if idle > self.idle_after:
+            base = self.max_interval
+        else:
+            # Chaves usadas com frequência são renovadas antes de expirar;
+            # as menos usadas se afastam do TTL em direção ao intervalo máximo
+            uses = max(self._decayed_uses(job, now), 1.0)
+            base = job.ttl * 0.8 * max(1.0, 4.0 / uses)
+        return min(max(base * self._budget_pressure(job.budget, now), self.min_interval), self.max_interval)
+
+    def _budget_pressure(self, budget, now) -> float:
+        """Fator de alongamento para que as chamadas previstas caibam no orçamento restante"""
+        planned_rate = 0.0
+        for job in self._jobs.values():
+            if job.budget is budget:
+                planned_rate += 1.0 / max(job.ttl * 0.8, self.min_interval)
+        planned_calls = planned_rate * seconds_left_today()
+        remaining = budget.remaining()
+        if remaining <= 0:
+            return float("inf")
+        return max(1.0, planned_calls / remaining)
+
+    def _next_due(self, job, now) -> float:
+        return now + self.interval(job, now)
+
+    def run_pending(self) -> float:
+        """Executa as atualizações vencidas; retorna segundos até a próxima"""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, j in self._jobs.items() if now - j.last_used > self.drop_after]:
+                del self._jobs[key]
+            due = sorted(
+                (j for j in self._jobs.values() if j.next_due <= now),
+                key=lambda j: -self._decayed_uses(j, now)
+            )
+
+        for job in due:
+            if self._stopped:
+                break
+            # A chamada em si é descontada pelo HttpClient ao sair para a API
+            if job.budget.remaining() <= 0:
+                with self._lock:
+                    job.next_due = now + self.max_interval
+                continue
+            try:
+                result = job.refresh()
+            except Exception as e:
+                print(f"Erro ao atualizar {job.key}: {e}")
+                result = None
+            with self._lock:
+                job.last_refresh = time.time()
+                job.next_due = self._next_due(job, job.last_refresh)
+            if self.on_refresh and result is not None:
+                self.on_refresh(job.key, result)
+
+        with self._lock:
+            if not self._jobs:
+                return self.max_interval
+            return max(min(j.next_due for j in self._jobs.values()) - time.time(), 1.0)
+
+    def _run(self):
+        while not self._stopped:
+            wait = self.run_pending()
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="agendador", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
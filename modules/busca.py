@@ -0,0 +1,174 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from modules.metricas import timed
+
+# Palavras muito comuns em português, ignoradas na indexação e na consulta
+STOPWORDS = {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "no", "na",
+    "nos", "nas", "um", "uma", "para", "por", "com", "que", "se", "ao", "aos"
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+
+def normalize_text(text: str) -> str:
+    """Remove acentos e caixa: "Ação" -> "acao" """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text: str) -> list:
+    """Quebra o texto em termos normalizados, sem stopwords"""
+    return [t for t in _TOKEN_RE.findall(normalize_text(text)) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """Índice invertido em memória com ranking BM25 e busca por prefixo.
+
+    Documentos são adicionados, atualizados e removidos um a um; o
+    vocabulário fica ordenado para expandir prefixos por busca binária.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    PREFIX_WEIGHT = 0.7   # peso de um termo que só casa por prefixo
+    MAX_EXPANSIONS = 64   # termos considerados por prefixo
+
+    def __init__(self):
+        self._postings = {}  # termo -> {doc_id: frequência}
+        self._vocabulary = []  # termos ordenados
+        self._docs = {}  # doc_id -> (frequências, dados, sequência, tamanho)
+        self._total_length = 0
+        self._sequence = 0
+        self._lock = threading.RLock()
+
+    def add(self, doc_id, text: str, data: dict = None):
+        """Indexa (ou reindexa) um documento; data é devolvido nos resultados"""
+        terms = tokenize(text)
+        with self._lock:
+            self._remove(doc_id)
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    insort(self._vocabulary, term)
+                postings[doc_id] = count
+            self._sequence += 1
+            self._docs[doc_id] = (counts, data, self._sequence, len(terms))
+            self._total_length += len(terms)
+
+    def add_many(self, documents):
+        """Indexa vários (doc_id, texto, dados) de uma vez"""
+        with self._lock:
+            for doc_id, text, data in documents:
+                self.add(doc_id, text, data)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        counts, _, _, length = entry
+        self._total_length -= length
+        for term in counts:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+
+    def _expand(self, term: str) -> list:
+        """Termos do vocabulário que começam com term (o exato primeiro)"""
+        start = bisect_left(self._vocabulary, term)
+        matches = []
+        for candidate in self._vocabulary[start:start + self.MAX_EXPANSIONS]:
+            if not candidate.startswith(term):
+                break
+            matches.append(candidate)
+        return matches
+
+    @timed("busca")
+    def search(self, query: str, limit: int = 20, kinds: set = None) -> list:
+        """Documentos que contêm todos os termos (cada um como palavra ou prefixo).
+
+        Retorna [(pontuação, doc_id, dados)] do mais relevante para o menos;
+        empates favorecem os documentos indexados mais recentemente.
+        kinds filtra pelo primeiro elemento de doc_id quando ele é uma tupla.
+        """
+        # O último termo ainda está sendo digitado: vale mesmo se for stopword ("de" -> "dentista")
+        words = _TOKEN_RE.findall(normalize_text(query))
+        terms = [w for w in words[:-1] if w not in STOPWORDS] + words[-1:]
+        if not terms:
+            return []
+        # ...mas, se for (o começo de) uma stopword depois de outros termos, é
+        # opcional: descartado quando zeraria os resultados ("casa d", "casa de")
+        last = terms[-1]
+        optional = None
+        if terms[:-1] and last not in terms[:-1] and any(w.startswith(last) for w in STOPWORDS):
+            optional = last
+        with self._lock:
+            total_docs = len(self._docs)
+            if not total_docs:
+                return []
+            average_length = self._total_length / total_docs or 1
+            k1, b = self.K1, self.B
+            docs = self._docs
+
+            # Termos mais raros primeiro: o conjunto candidato encolhe mais cedo
+            # (o opcional por último)
+            expansions = []
+            for term in dict.fromkeys(terms):
+                candidates = self._expand(term)
+                if not candidates:
+                    if term == optional:
+                        continue
+                    return []
+                size = sum(len(self._postings[c]) for c in candidates)
+                expansions.append((size, term, candidates))
+            expansions.sort(key=lambda item: (item[1] == optional, item[0]))
+
+            scores = None
+            for _, term, candidates in expansions:
+                term_scores = {}
+                for candidate in candidates:
+                    postings = self._postings[candidate]
+                    weight = 1.0 if candidate == term else self.PREFIX_WEIGHT
+                    idf = weight * math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                    if scores is None:
+                        items = postings.items()
+                    else:
+                        items = ((d, postings[d]) for d in scores if d in postings)
+                    for doc_id, tf in items:
+                        norm = tf * (k1 + 1) / (tf + k1 * (1 - b + b * docs[doc_id][3] / average_length))
+                        score = idf * norm
+                        if score > term_scores.get(doc_id, 0.0):
+                            term_scores[doc_id] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    merged = {doc_id: scores[doc_id] + s for doc_id, s in term_scores.items()}
+                    if not merged and term == optional:
+                        break
+                    scores = merged
+                if not scores:
+                    return []
+
+            if kinds is not None:
+                scores = {d: s for d, s in scores.items() if isinstance(d, tuple) and d[0] in kinds}
+            ranked = heapq.nlargest(
+                limit, scores.items(), key=lambda item: (item[1], self._docs[item[0]][2])
+            )
+            return [(score, doc_id, self._docs[doc_id][1]) for doc_id, score in ranked]
+
+    def __len__(self):
+        return len(self._docs)
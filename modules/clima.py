@@ -1,29 +1,183 @@
-import requests
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from datetime import datetime  
+from modules.metricas import timed, has_error_key
+from modules.coalescencia import SingleFlight
+from modules.rede import HttpClient, UpstreamError
+from modules.agendador import QuotaBudget
 
 load_dotenv()
 
-def get_weather(city: str) -> dict:
+OPENWEATHER_API_URL = os.getenv("OPENWEATHER_API_URL", "http://api.openweathermap.org/data/2.5")
+
+# Cota diária da API, descontada a cada requisição (pré-buscas inclusive) e
+# compartilhada em arquivo entre reinícios e processos
+quota_budget = QuotaBudget(
+    int(os.getenv("OPENWEATHER_DAILY_QUOTA", 500)),
+    "openweather",
+    os.getenv("API_QUOTA_FILE", "cotacoes.sqlite3")
+)
+
+# Cliente compartilhado: reaproveita conexões TCP/TLS, com timeouts e circuit breaker
+_client = HttpClient("openweather", budget=quota_budget)
+
+
+def normalize_city(city: str) -> str:
+    """Normaliza o nome da cidade para uso como chave de cache"""
+    return " ".join(city.split()).casefold()
+
+
+class WeatherCache:
+    """Cache LRU com TTL para dados climáticos, opcionalmente persistido em disco"""
+
+    def __init__(self, ttl: float = 600, max_entries: int = 128, path: str = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()  # cidade normalizada -> (dados, obtido_em)
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def get(self, city: str):
+        """Retorna os dados em cache ou None se ausentes/expirados"""
+        key = normalize_city(city)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data, fetched_at = entry
+            if time.time() - fetched_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def put(self, city: str, data: dict):
+        key = normalize_city(city)
+        with self._lock:
+            self._entries[key] = (data, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, (data, fetched_at) in stored.items():
+            if now - fetched_at <= self.ttl:
+                self._entries[key] = (data, fetched_at)
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Erro ao salvar cache do clima: {e}")
+
+
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 600))
+
+_cache = WeatherCache(
+    ttl=WEATHER_CACHE_TTL,
+    max_entries=int(os.getenv("WEATHER_CACHE_SIZE", 128)),
+    path=os.getenv("WEATHER_CACHE_FILE") or None
+)
+
+# Buscas simultâneas da mesma cidade compartilham uma única requisição
+_inflight = SingleFlight()
+
+
+@timed("clima", is_error=has_error_key)
+def get_weather(city: str, use_cache: bool = True) -> dict:
+    if use_cache:
+        cached = _cache.get(city)
+        if cached is not None:
+            return cached
+    
+    return _inflight.do(normalize_city(city), _fetch_weather, city)
+
+
+# Pool limitado para buscas de várias cidades em paralelo
+_batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("WEATHER_BATCH_WORKERS", 8)),
+    thread_name_prefix="clima"
+)
+
+
+def get_weather_many(cities: list, use_cache: bool = True):
+    """Busca o clima de várias cidades em paralelo, sem repetir cidades.
+
+    Gera pares (cidade, dados) à medida que cada busca termina; cidades em
+    cache saem imediatamente.
+    """
+    unique = {}
+    for city in cities:
+        key = normalize_city(city)
+        if key and key not in unique:
+            unique[key] = city.strip()
+
+    futures = {}
+    for city in unique.values():
+        cached = _cache.get(city) if use_cache else None
+        if cached is not None:
+            yield city, cached
+        else:
+            futures[_batch_executor.submit(get_weather, city, use_cache)] = city
+
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+
+def _fetch_weather(city: str) -> dict:
     try:
         api_key = os.getenv("OPENWEATHER_API_KEY")
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric&lang=pt"
-        response = requests.get(url)
-        data = response.json()
+        data = _client.get_json(
+            f"{OPENWEATHER_API_URL}/weather",
+            cache_key=normalize_city(city),
+            params={"q": city, "appid": api_key, "units": "metric", "lang": "pt"}
+        )
         
         if data.get('cod') != 200:
             return {'error': data.get('message', 'Erro na API')}
         
-        return {
+        weather = {
             'cidade': data['name'],
             'temperatura': data['main']['temp'],
             'descricao': data['weather'][0]['description'].capitalize(),
             'umidade': data['main']['humidity'],
             'vento': data['wind']['speed'],
             'nascer_do_sol': datetime.fromtimestamp(data['sys']['sunrise']).strftime('%H:%M'),
-            'por_do_sol': datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M')
+            'por_do_sol': datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M'),
+            'icone': data['weather'][0]['icon']
         }
+        if data.get('_stale'):
+            # API fora do ar: serve o último valor conhecido sem renovar o cache
+            weather['desatualizado'] = True
+        else:
+            _cache.put(city, weather)
+        return weather
         
+    except UpstreamError as e:
+        return {'error': str(e)}
     except Exception as e:
         return {'error': str(e)}
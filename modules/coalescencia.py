@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Agrupa chamadas concorrentes idênticas: só a primeira executa, as demais
+    aguardam e recebem o mesmo resultado (ou a mesma exceção)"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class Debouncer:
+    """Colapsa disparos rápidos da interface: o primeiro executa na hora e os
+    seguintes, dentro da janela, viram uma única execução ao final dela"""
+
+    def __init__(self, widget, delay_ms: int = 300):
+        self.widget = widget
+        self.delay_ms = delay_ms
+        self._timer = None
+        self._trailing = None
+
+    def __call__(self, func):
+        if self._timer is None:
+            func()
+        else:
+            self.widget.after_cancel(self._timer)
+            self._trailing = func
+        self._timer = self.widget.after(self.delay_ms, self._flush)
+
+    def _flush(self):
+        self._timer = None
+        func, self._trailing = self._trailing, None
+        if func is not None:
+            func()
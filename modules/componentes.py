@@ -0,0 +1,297 @@
+import customtkinter as ctk
+
+
+class _TableRow:
+    """Linha reutilizável da tabela: um frame e um label por coluna"""
+
+    def __init__(self, parent, widths):
+        self.frame = ctk.CTkFrame(parent)
+        self.labels = []
+        for width in widths:
+            label = ctk.CTkLabel(self.frame, text="", width=width)
+            label.pack(side="left", padx=2)
+            self.labels.append(label)
+        self.key = None
+        self.cells = [None] * len(widths)
+        self.visible = False
+
+    def set(self, key, cells):
+        """Atualiza apenas as células cujo texto mudou"""
+        self.key = key
+        for i, text in enumerate(cells):
+            if self.cells[i] != text:
+                self.labels[i].configure(text=text)
+                self.cells[i] = text
+
+    def hide(self):
+        self.key = None
+        if self.visible:
+            self.frame.pack_forget()
+            self.visible = False
+
+
+class RecyclingTable:
+    """Tabela com um conjunto fixo de linhas reaproveitadas entre atualizações"""
+
+    def __init__(self, parent, headers, widths, max_rows: int = 5,
+                 empty_text: str = "Nenhum registro"):
+        self.parent = parent
+        self.max_rows = max_rows
+
+        # Cabeçalho
+        self.header = ctk.CTkFrame(parent)
+        for header, width in zip(headers, widths):
+            ctk.CTkLabel(
+                self.header,
+                text=header,
+                font=("Arial", 12, "bold"),
+                width=width
+            ).pack(side="left", padx=2)
+
+        self.empty_label = ctk.CTkLabel(parent, text=empty_text, text_color="gray")
+        self._slots = [_TableRow(parent, widths) for _ in range(max_rows)]
+        self._visible = []
+        self._empty = None
+
+    def update(self, rows):
+        """Exibe rows [(chave, [células])], mexendo só no que mudou"""
+        rows = rows[:self.max_rows]
+        self._set_empty(not rows)
+
+        by_key = {slot.key: slot for slot in self._visible}
+        new_keys = {key for key, _ in rows}
+        free = [slot for slot in self._slots if slot.key not in new_keys or not slot.visible]
+
+        ordered = []
+        for key, cells in rows:
+            slot = by_key.pop(key, None) or free.pop(0)
+            slot.set(key, cells)
+            ordered.append(slot)
+
+        for slot in free:
+            slot.hide()
+
+        # Reposiciona apenas as linhas cujo vizinho anterior mudou
+        old_previous = {}
+        previous = self.header
+        for slot in self._visible:
+            old_previous[slot] = previous
+            previous = slot.frame
+
+        previous = self.header
+        for slot in ordered:
+            if not slot.visible or old_previous.get(slot) is not previous:
+                slot.frame.pack(fill="x", pady=1, after=previous)
+                slot.visible = True
+            previous = slot.frame
+        self._visible = ordered
+
+    def bind(self, sequence, func):
+        """Associa um evento ao cabeçalho e a todas as linhas"""
+        for widget in [self.header, self.empty_label]:
+            widget.bind(sequence, func)
+        for slot in self._slots:
+            slot.frame.bind(sequence, func)
+            for label in slot.labels:
+                label.bind(sequence, func)
+
+    def _set_empty(self, empty: bool):
+        if empty == self._empty:
+            return
+        self._empty = empty
+        if empty:
+            self.header.pack_forget()
+            self.empty_label.pack()
+        else:
+            self.empty_label.pack_forget()
+            self.header.pack(fill="x", before=self._slots[0].frame if self._slots[0].visible else None)
+
+
+class VirtualTable:
+    """Tabela virtualizada: só as linhas visíveis existem como widgets e as
+    páginas são buscadas sob demanda conforme a rolagem"""
+
+    def __init__(self, parent, headers, widths, load_page, format_row,
+                 visible_rows: int = 10, page_size: int = 50, max_loaded: int = 200,
+                 empty_text: str = "Nenhum registro"):
+        # load_page(direction, cursor_row, callback) busca uma página de forma
+        # assíncrona; direction é "older" ou "newer" e callback recebe as linhas
+        self.load_page = load_page
+        self.format_row = format_row
+        self.visible_rows = visible_rows
+        self.page_size = page_size
+        self.max_loaded = max(max_loaded, page_size + visible_rows)
+
+        self.frame = ctk.CTkFrame(parent)
+        body = ctk.CTkFrame(self.frame, fg_color="transparent")
+        body.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.table = RecyclingTable(body, headers, widths, max_rows=visible_rows,
+                                    empty_text=empty_text)
+
+        for widget in (self.frame, body, self.table):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda e: self.scroll(-1))
+            widget.bind("<Button-5>", lambda e: self.scroll(1))
+
+        self._rows = []  # janela de linhas carregadas, mais recente primeiro
+        self._offset = 0
+        self._has_older = True
+        self._has_newer = False
+        self._loading = False
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    @property
+    def rows(self):
+        """Linhas carregadas, mais recente primeiro"""
+        return self._rows
+
+    def show_rows(self, rows):
+        """Exibe linhas já conhecidas (ex.: estado salvo) até a próxima página chegar"""
+        self._rows = list(rows)
+        self._offset = 0
+        self._render()
+
+    def prepend(self, rows):
+        """Insere linhas novas no topo, sem consultar a origem.
+
+        Se o topo da janela foi descartado, as linhas chegam pela próxima
+        página "newer" ao rolar para cima.
+        """
+        if self._has_newer:
+            return
+        self._rows[:0] = rows
+        if self._offset:
+            self._offset += len(rows)
+        if len(self._rows) > self.max_loaded:
+            del self._rows[self.max_loaded:]
+            self._has_older = True
+        self._render()
+
+    def reset(self):
+        """Descarta a janela carregada e busca a primeira página"""
+        self._has_older = True
+        self._has_newer = False
+        self._loading = False
+        self._request("reset", None)
+
+    def scroll(self, delta: int):
+        """Rola delta linhas (negativo sobe) e pré-busca páginas vizinhas"""
+        limit = max(len(self._rows) - self.visible_rows, 0)
+        self._offset = min(max(self._offset + delta, 0), limit)
+        self._render()
+
+        margin = self.visible_rows
+        if self._has_older and self._offset + self.visible_rows + margin >= len(self._rows):
+            self._request("older", self._rows[-1] if self._rows else None)
+        elif self._has_newer and self._offset <= margin:
+            self._request("newer", self._rows[0])
+
+    def _request(self, direction, cursor_row):
+        if self._loading and direction != "reset":
+            return
+        self._loading = True
+        load_direction = "older" if direction == "reset" else direction
+        self.load_page(load_direction, cursor_row,
+                       lambda rows: self._on_page(direction, rows))
+
+    def _on_page(self, direction, rows):
+        self._loading = False
+        if direction == "reset":
+            self._rows = list(rows)
+            self._offset = 0
+            self._has_older = len(rows) >= self.page_size
+        elif direction == "older":
+            self._has_older = len(rows) >= self.page_size
+            self._rows.extend(rows)
+            excess = len(self._rows) - self.max_loaded
+            if excess > 0:
+                # Descarta o topo para manter a memória constante
+                del self._rows[:excess]
+                self._offset = max(self._offset - excess, 0)
+                self._has_newer = True
+        else:
+            self._has_newer = len(rows) >= self.page_size
+            self._rows[:0] = rows
+            self._offset += len(rows)
+            if len(self._rows) > self.max_loaded:
+                del self._rows[self.max_loaded:]
+                self._has_older = True
+        self._render()
+
+    def _render(self):
+        window = self._rows[self._offset:self._offset + self.visible_rows]
+        self.table.update([self.format_row(item) for item in window])
+        if self._rows:
+            first = self._offset / len(self._rows)
+            last = min((self._offset + self.visible_rows) / len(self._rows), 1.0)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            target = int(float(value) * len(self._rows))
+            self.scroll(target - self._offset)
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll(int(value) * step)
+
+
+class ChartView:
+    """Exibe uma série como imagem e só redesenha quando a série ou o tamanho mudam"""
+
+    RESIZE_DELAY_MS = 120
+
+    def __init__(self, parent, renderer, height: int = 260):
+        self.renderer = renderer
+        self.frame = ctk.CTkFrame(parent, height=height)
+        self.frame.pack_propagate(False)
+        self.label = ctk.CTkLabel(self.frame, text="")
+        self.label.place(relx=0, rely=0, relwidth=1, relheight=1)
+        self.frame.bind("<Configure>", self._on_configure)
+
+        self.series = None
+        self._size = None
+        self._shown = None
+        self._image = None
+        self._pending = None
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def show(self, series):
+        """Define a série exibida"""
+        self.series = series
+        self.refresh()
+
+    def refresh(self):
+        """Redesenha apenas se a versão da série ou o tamanho mudaram"""
+        if self.series is None or self._size is None:
+            return
+        width, height = self._size
+        key = (self.series.name, self.series.version, width, height)
+        if key == self._shown:
+            return
+        image = self.renderer.render(self.series, width, height)
+        self._image = ctk.CTkImage(light_image=image, dark_image=image, size=(width, height))
+        self.label.configure(image=self._image)
+        self._shown = key
+
+    def _on_configure(self, event):
+        # Agrupa eventos de redimensionamento em um único redesenho
+        if self._pending is not None:
+            self.frame.after_cancel(self._pending)
+        self._pending = self.frame.after(self.RESIZE_DELAY_MS, self._resize, event.width, event.height)
+
+    def _resize(self, width, height):
+        self._pending = None
+        if width > 1 and height > 1 and (width, height) != self._size:
+            self._size = (width, height)
+            self.refresh()
@@ -0,0 +1,53 @@
+"""Estado do dashboard salvo ao sair e usado para pintar a janela na abertura"""
+
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+
+# Versão do formato; arquivos de outra versão são ignorados
+STATE_VERSION = 1
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def load_state(path: str) -> dict:
+    """Lê o último estado salvo; devolve {} se não houver arquivo válido"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or state.get("versao") != STATE_VERSION:
+        return {}
+
+    # Datas do histórico voltam a ser datetime, como vêm do banco
+    for row in state.get("historico", []):
+        try:
+            row["data_conversao"] = datetime.fromisoformat(row["data_conversao"])
+        except (KeyError, TypeError, ValueError):
+            state["historico"] = []
+            break
+    return state
+
+
+def save_state(path: str, state: dict) -> bool:
+    """Grava o estado de forma atômica (arquivo temporário + rename)"""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"versao": STATE_VERSION, "salvo_em": datetime.now(), **state},
+                f, default=_json_default, ensure_ascii=False
+            )
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Erro ao salvar estado do dashboard: {e}")
+        return False
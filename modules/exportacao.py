@@ -0,0 +1,144 @@
+"""Exportação e importação em streaming do histórico de conversões.
+
+Uso pela linha de comando:
+
+    python -m modules.exportacao exportar historico.csv
+    python -m modules.exportacao importar historico.jsonl --lote 5000
+"""
+
+import argparse
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+from database import db
+from modules.metricas import timed
+from modules.moedas import HistoryRollups, HistoryWriter
+
+COLUMNS = ["id", "data_conversao", "moeda_origem", "moeda_destino",
+           "valor_origem", "valor_convertido", "taxa_cambio"]
+
+
+def _format_from_path(path: str) -> str:
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def iter_history(chunk_size: int = 1000):
+    """Gera as linhas do histórico em ordem de id com cursor sem buffer e fetchmany"""
+    with db.connection() as conn:
+        cursor = conn.cursor(buffered=False, dictionary=True)
+        try:
+            cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM historico_moedas ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            # Interrompido no meio: descarta o restante do resultado antes de devolver a conexão
+            if getattr(conn, "unread_result", False):
+                conn.get_rows()
+            cursor.close()
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+@timed("exportar_historico")
+def export_history(path: str, fmt: str = None, chunk_size: int = 1000) -> int:
+    """Exporta o histórico para CSV ou JSONL sem carregá-lo inteiro na memória"""
+    fmt = fmt or _format_from_path(path)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for row in iter_history(chunk_size):
+                writer.writerow([_serialize(row[c]) for c in COLUMNS])
+                count += 1
+        else:
+            for row in iter_history(chunk_size):
+                f.write(json.dumps({c: _serialize(row[c]) for c in COLUMNS}) + "\n")
+                count += 1
+    return count
+
+
+def _read_records(path: str, fmt: str):
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _to_row(record: dict) -> tuple:
+    moment = record.get("data_conversao")
+    return (
+        record["moeda_origem"],
+        record["moeda_destino"],
+        float(record["valor_origem"]),
+        float(record["valor_convertido"]),
+        float(record["taxa_cambio"]),
+        datetime.fromisoformat(moment) if moment else datetime.now()
+    )
+
+
+def _chunks(records, chunk_size: int):
+    chunk = []
+    for record in records:
+        chunk.append(_to_row(record))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@timed("importar_historico")
+def import_history(path: str, fmt: str = None, chunk_size: int = 1000) -> int:
+    """Importa CSV ou JSONL em lotes de executemany, um commit por lote"""
+    fmt = fmt or _format_from_path(path)
+    rollups = HistoryRollups()
+    count = 0
+    with db.connection() as conn:
+        rollups.ensure_tables(conn)
+        cursor = conn.cursor()
+        try:
+            for chunk in _chunks(_read_records(path, fmt), chunk_size):
+                cursor.executemany(HistoryWriter.INSERT_QUERY, chunk)
+                rollups.apply(cursor, chunk)
+                conn.commit()
+                count += len(chunk)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta/importa o histórico de conversões")
+    parser.add_argument("acao", choices=["exportar", "importar"])
+    parser.add_argument("arquivo", help="caminho .csv ou .jsonl")
+    parser.add_argument("--formato", choices=["csv", "jsonl"])
+    parser.add_argument("--lote", type=int, default=1000, help="linhas por lote")
+    args = parser.parse_args(argv)
+
+    if args.acao == "exportar":
+        count = export_history(args.arquivo, args.formato, args.lote)
+        print(f"{count} conversões exportadas para {args.arquivo}")
+    else:
+        count = import_history(args.arquivo, args.formato, args.lote)
+        print(f"{count} conversões importadas de {args.arquivo}")
+
+
+if __name__ == "__main__":
+    main()
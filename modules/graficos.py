@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+class TimeSeries:
+    """Série temporal em arrays NumPy com número de versão para invalidar caches"""
+
+    def __init__(self, name: str, capacity: int = 256):
+        self.name = name
+        self.version = 0
+        self._size = 0
+        self._x = np.empty(capacity, dtype=np.float64)
+        self._y = np.empty(capacity, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def append(self, y: float, x: float = None):
+        with self._lock:
+            if self._size == len(self._x):
+                self._x = np.resize(self._x, self._size * 2)
+                self._y = np.resize(self._y, self._size * 2)
+            self._x[self._size] = time.time() if x is None else x
+            self._y[self._size] = y
+            self._size += 1
+            self.version += 1
+
+    def replace(self, x, y):
+        """Substitui os dados; a versão só muda se os dados forem diferentes"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        with self._lock:
+            size = self._size
+            if len(x) == size and np.array_equal(x, self._x[:size]) and np.array_equal(y, self._y[:size]):
+                return
+            self._x = x.copy()
+            self._y = y.copy()
+            self._size = len(x)
+            self.version += 1
+
+    def data(self):
+        with self._lock:
+            return self._x[:self._size].copy(), self._y[:self._size].copy()
+
+    def __len__(self):
+        return self._size
+
+
+def lttb(x, y, threshold: int):
+    """Downsampling Largest-Triangle-Three-Buckets preservando a forma da série"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    sampled = np.empty(threshold, dtype=np.int64)
+    sampled[0] = 0
+    sampled[-1] = n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Média do próximo balde (ou último ponto)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Ponto do balde atual que forma o maior triângulo
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        sampled[i + 1] = previous
+    return x[sampled], y[sampled]
+
+
+def minmax_buckets(x, y, buckets: int):
+    """Downsampling mínimo/máximo por balde (preserva picos)"""
+    n = len(x)
+    if buckets * 2 >= n or buckets < 1:
+        return x, y
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    indexes = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if start == end:
+            continue
+        lo = start + int(np.argmin(y[start:end]))
+        hi = start + int(np.argmax(y[start:end]))
+        indexes.extend(sorted({lo, hi}))
+    indexes = np.asarray(indexes)
+    return x[indexes], y[indexes]
+
+
+class ChartRenderer:
+    """Desenha séries em imagens PIL, com cache por (série, versão, tamanho)"""
+
+    BACKGROUND = "#2b2b2b"
+    GRID = "#3d3d3d"
+    LINE = "#1f6aa5"
+    TEXT = "#dce4ee"
+    MARGIN = (60, 15, 15, 30)  # esquerda, topo, direita, base
+
+    def __init__(self, max_cached: int = 16, method: str = "lttb"):
+        self.max_cached = max_cached
+        self.method = method
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, series: TimeSeries, width: int, height: int) -> Image.Image:
+        key = (series.name, series.version, width, height)
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+                return image
+
+        image = self._draw(series, width, height)
+        with self._lock:
+            self._cache[key] = image
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return image
+
+    def _downsample(self, x, y, pixels: int):
+        if self.method == "minmax":
+            return minmax_buckets(x, y, max(pixels // 2, 1))
+        return lttb(x, y, pixels)
+
+    def _draw(self, series: TimeSeries, width: int, height: int) -> Image.Image:
+        image = Image.new("RGB", (width, height), self.BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        left, top, right, bottom = self.MARGIN
+        plot_w, plot_h = width - left - right, height - top - bottom
+        x, y = series.data()
+
+        if len(x) < 2 or plot_w < 10 or plot_h < 10:
+            draw.text((left, height // 2), "Sem dados suficientes", fill=self.TEXT)
+            return image
+
+        x, y = self._downsample(x, y, plot_w)
+        x_min, x_max = x[0], x[-1]
+        y_min, y_max = float(y.min()), float(y.max())
+        if y_max == y_min:
+            y_min, y_max = y_min - 1, y_max + 1
+        x_span = (x_max - x_min) or 1.0
+
+        # Grade e rótulos do eixo Y
+        for i in range(5):
+            gy = top + plot_h * i / 4
+            draw.line([(left, gy), (width - right, gy)], fill=self.GRID)
+            value = y_max - (y_max - y_min) * i / 4
+            draw.text((5, gy - 6), f"{value:,.2f}", fill=self.TEXT)
+
+        px = left + (x - x_min) / x_span * plot_w
+        py = top + (y_max - y) / (y_max - y_min) * plot_h
+        draw.line(list(zip(px.tolist(), py.tolist())), fill=self.LINE, width=2)
+
+        # Rótulos do eixo X (início e fim)
+        fmt = "%d/%m %H:%M"
+        draw.text((left, height - bottom + 8), datetime.fromtimestamp(x_min).strftime(fmt), fill=self.TEXT)
+        end_label = datetime.fromtimestamp(x_max).strftime(fmt)
+        draw.text((width - right - 7 * len(end_label), height - bottom + 8), end_label, fill=self.TEXT)
+        return image
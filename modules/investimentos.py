@@ -0,0 +1,401 @@
+import threading
+import numpy as np
+from database import db
+from modules.metricas import timed
+from modules.graficos import TimeSeries
+
+
+class Portfolio:
+    """Carteira em arrays NumPy com avaliação vetorizada e incremental.
+
+    Os lotes (ativo, quantidade, custo, moeda) ficam em arrays compactos e são
+    agregados por ativo. Valor, alocação e P&L na moeda alvo são mantidos em
+    cache: mudar um lote ou um preço ajusta só o ativo afetado, e mudar uma
+    taxa reavalia só os ativos cotados naquela moeda.
+
+    O custo de cada lote é convertido pela taxa do dia da compra; sem preço
+    informado, o P&L reflete só a variação cambial desde então.
+    """
+
+    # Arrays por ativo: crescem com capacidade dobrada, como os de lotes
+    ASSET_ARRAYS = (
+        "asset_currency", "asset_quantity", "asset_cost", "asset_book_cost",
+        "asset_open_cost", "asset_price", "_value", "_cost"
+    )
+
+    def __init__(self, target_currency: str = "BRL", capacity: int = 1024):
+        self.target_currency = target_currency
+        self._lock = threading.RLock()
+
+        # Lotes
+        self._lots = 0
+        self.lot_asset = np.empty(capacity, dtype=np.int32)
+        self.lot_quantity = np.empty(capacity, dtype=np.float64)
+        self.lot_cost = np.empty(capacity, dtype=np.float64)
+        self.lot_rate = np.empty(capacity, dtype=np.float64)  # taxa da compra; NaN = desconhecida
+
+        # Ativos e moedas (arrays por ativo válidos até len(self.assets))
+        self.assets = []
+        self._asset_index = {}
+        self.currencies = []
+        self._currency_index = {}
+        self.asset_currency = np.empty(0, dtype=np.int16)
+        self.asset_quantity = np.empty(0, dtype=np.float64)
+        self.asset_cost = np.empty(0, dtype=np.float64)
+        self.asset_book_cost = np.empty(0, dtype=np.float64)  # custo na moeda alvo pela taxa da compra
+        self.asset_open_cost = np.empty(0, dtype=np.float64)  # custo nativo dos lotes sem taxa da compra
+        self.asset_price = np.empty(0, dtype=np.float64)  # NaN = usa o preço médio de custo
+        self.rates = np.empty(0, dtype=np.float64)  # moeda -> moeda alvo
+
+        # Avaliação em cache (moeda alvo)
+        self._value = np.empty(0, dtype=np.float64)
+        self._cost = np.empty(0, dtype=np.float64)
+        self.total_value = 0.0
+        self.total_cost = 0.0
+
+    # ---------- cadastro ----------
+    def _currency_id(self, currency: str) -> int:
+        index = self._currency_index.get(currency)
+        if index is None:
+            index = len(self.currencies)
+            self.currencies.append(currency)
+            self._currency_index[currency] = index
+            self.rates = np.append(self.rates, 1.0 if currency == self.target_currency else np.nan)
+        return index
+
+    def asset_currency_of(self, asset: str):
+        """Moeda em que o ativo é cotado, ou None se ele ainda não está na carteira"""
+        index = self._asset_index.get(asset)
+        return None if index is None else self.currencies[self.asset_currency[index]]
+
+    def _asset_id(self, asset: str, currency: str) -> int:
+        index = self._asset_index.get(asset)
+        if index is not None and self.currencies[self.asset_currency[index]] != currency:
+            raise ValueError(f"{asset} é cotado em {self.currencies[self.asset_currency[index]]}")
+        currency_id = self._currency_id(currency)
+        if index is None:
+            index = len(self.assets)
+            self._reserve_assets(index + 1)
+            self.assets.append(asset)
+            self._asset_index[asset] = index
+            self.asset_currency[index] = currency_id
+            for name in self.ASSET_ARRAYS[1:]:
+                getattr(self, name)[index] = 0.0
+            self.asset_price[index] = np.nan
+        return index
+
+    def _reserve_assets(self, needed: int):
+        capacity = len(self.asset_quantity)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 16)
+        count = len(self.assets)
+        for name in self.ASSET_ARRAYS:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:count] = old[:count]
+            setattr(self, name, new)
+
+    def _reserve(self, extra: int):
+        needed = self._lots + extra
+        capacity = len(self.lot_asset)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in ("lot_asset", "lot_quantity", "lot_cost", "lot_rate"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._lots] = old[:self._lots]
+            setattr(self, name, new)
+
+    def _add_costs(self, asset_ids, costs, rates):
+        """Soma custos aos ativos: pela taxa da compra, ou em aberto se ela é desconhecida"""
+        known = ~np.isnan(rates)
+        np.add.at(self.asset_cost, asset_ids, costs)
+        np.add.at(self.asset_book_cost, asset_ids[known], costs[known] * rates[known])
+        np.add.at(self.asset_open_cost, asset_ids[~known], costs[~known])
+
+    def add_lot(self, asset: str, quantity: float, cost: float, currency: str = "BRL",
+                purchase_rate: float = None) -> int:
+        """Adiciona um lote e retorna seu índice.
+
+        purchase_rate é a taxa moeda -> moeda alvo no dia da compra; sem ela, o
+        custo do lote acompanha a taxa atual.
+        """
+        with self._lock:
+            asset_id = self._asset_id(asset, currency)
+            if currency == self.target_currency:
+                purchase_rate = 1.0
+            rate = np.nan if purchase_rate is None else float(purchase_rate)
+            self._reserve(1)
+            lot = self._lots
+            self.lot_asset[lot] = asset_id
+            self.lot_quantity[lot] = quantity
+            self.lot_cost[lot] = cost
+            self.lot_rate[lot] = rate
+            self._lots += 1
+            self.asset_quantity[asset_id] += quantity
+            self._add_costs(np.array([asset_id]), np.array([cost], dtype=np.float64), np.array([rate]))
+            self._revalue_assets(np.array([asset_id]))
+            return lot
+
+    def add_lots(self, assets, quantities, costs, currencies, purchase_rates=None) -> None:
+        """Adiciona vários lotes de uma vez e reavalia num único passo vetorizado"""
+        with self._lock:
+            asset_ids = np.array(
+                [self._asset_id(a, c) for a, c in zip(assets, currencies)], dtype=np.int32
+            )
+            quantities = np.asarray(quantities, dtype=np.float64)
+            costs = np.asarray(costs, dtype=np.float64)
+            if purchase_rates is None:
+                purchase_rates = [None] * len(asset_ids)
+            rates = np.array(
+                [1.0 if c == self.target_currency else (np.nan if r is None else float(r))
+                 for c, r in zip(currencies, purchase_rates)],
+                dtype=np.float64
+            )
+            self._reserve(len(asset_ids))
+            start, end = self._lots, self._lots + len(asset_ids)
+            self.lot_asset[start:end] = asset_ids
+            self.lot_quantity[start:end] = quantities
+            self.lot_cost[start:end] = costs
+            self.lot_rate[start:end] = rates
+            self._lots = end
+            np.add.at(self.asset_quantity, asset_ids, quantities)
+            self._add_costs(asset_ids, costs, rates)
+            self.revalue()
+
+    def update_lot(self, lot: int, quantity: float = None, cost: float = None):
+        """Altera um lote existente ajustando apenas o ativo correspondente"""
+        with self._lock:
+            asset_id = self.lot_asset[lot]
+            if quantity is not None:
+                self.asset_quantity[asset_id] += quantity - self.lot_quantity[lot]
+                self.lot_quantity[lot] = quantity
+            if cost is not None:
+                self._add_costs(
+                    np.array([asset_id]),
+                    np.array([cost - self.lot_cost[lot]], dtype=np.float64),
+                    self.lot_rate[lot:lot + 1]
+                )
+                self.lot_cost[lot] = cost
+            self._revalue_assets(np.array([asset_id]))
+
+    def remove_lot(self, lot: int):
+        """Zera o lote (o índice continua válido para os demais)"""
+        self.update_lot(lot, quantity=0.0, cost=0.0)
+
+    # ---------- preços e taxas ----------
+    def set_price(self, asset: str, price: float):
+        """Atualiza o preço unitário de um ativo na sua moeda de cotação"""
+        with self._lock:
+            asset_id = self._asset_index[asset]
+            self.asset_price[asset_id] = price
+            self._revalue_assets(np.array([asset_id]))
+
+    def set_rate(self, currency: str, rate: float):
+        """Atualiza a taxa moeda -> moeda alvo e reavalia só os ativos dessa moeda"""
+        with self._lock:
+            currency_id = self._currency_id(currency)
+            self.rates[currency_id] = rate
+            count = len(self.assets)
+            self._revalue_assets(np.flatnonzero(self.asset_currency[:count] == currency_id))
+
+    def missing_rates(self) -> list:
+        """Moedas ainda sem taxa para a moeda alvo"""
+        return [c for c, r in zip(self.currencies, self.rates) if np.isnan(r)]
+
+    def update_rates(self, converter) -> None:
+        """Busca no CurrencyConverter as taxas de todas as moedas da carteira"""
+        for currency in list(self.currencies):
+            if currency == self.target_currency:
+                continue
+            rate = converter.get_exchange_rate(currency, self.target_currency)
+            if rate:
+                self.set_rate(currency, rate)
+
+    # ---------- avaliação ----------
+    def _asset_values(self, asset_ids):
+        quantity = self.asset_quantity[asset_ids]
+        price = self.asset_price[asset_ids]
+        cost = self.asset_cost[asset_ids]
+        # Sem preço informado, o ativo vale o custo médio
+        native = np.where(np.isnan(price), cost, quantity * price)
+        rate = self.rates[self.asset_currency[asset_ids]]
+        # Custo pela taxa da compra; lotes antigos, sem ela, usam a taxa atual
+        basis = self.asset_book_cost[asset_ids] + self.asset_open_cost[asset_ids] * rate
+        # Sem taxa atual o ativo fica de fora do valor e do custo
+        missing = np.isnan(rate)
+        return np.where(missing, 0.0, native * rate), np.where(missing, 0.0, basis)
+
+    def _revalue_assets(self, asset_ids):
+        if len(asset_ids) == 0:
+            return
+        value, cost = self._asset_values(asset_ids)
+        self.total_value += float(value.sum() - self._value[asset_ids].sum())
+        self.total_cost += float(cost.sum() - self._cost[asset_ids].sum())
+        self._value[asset_ids] = value
+        self._cost[asset_ids] = cost
+
+    def revalue(self):
+        """Reavalia a carteira inteira num único passo vetorizado"""
+        with self._lock:
+            count = len(self.assets)
+            value, cost = self._asset_values(np.arange(count))
+            self._value[:count] = value
+            self._cost[:count] = cost
+            self.total_value = float(value.sum())
+            self.total_cost = float(cost.sum())
+
+    def valuation(self) -> dict:
+        """Valor total, P&L e alocação por ativo na moeda alvo"""
+        with self._lock:
+            count = len(self.assets)
+            value = self._value[:count].copy()
+            cost = self._cost[:count].copy()
+            total = self.total_value
+            allocation = value / total if total else np.zeros_like(value)
+            order = np.argsort(-value)
+            return {
+                "moeda": self.target_currency,
+                "valor_total": total,
+                "custo_total": self.total_cost,
+                "pnl": total - self.total_cost,
+                "pnl_pct": (total / self.total_cost - 1) * 100 if self.total_cost else 0.0,
+                "sem_taxa": self.missing_rates(),
+                "ativos": [
+                    {
+                        "ativo": self.assets[i],
+                        "moeda": self.currencies[self.asset_currency[i]],
+                        "quantidade": float(self.asset_quantity[i]),
+                        "valor": float(value[i]),
+                        "alocacao": float(allocation[i]),
+                        "pnl": float(value[i] - cost[i])
+                    }
+                    for i in order
+                    if self.asset_quantity[i]
+                ]
+            }
+
+    def __len__(self):
+        return self._lots
+
+
+class InvestmentManager:
+    """Persistência dos lotes de investimento no MySQL, alimentando o Portfolio"""
+
+    CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS investimentos (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            ativo VARCHAR(20) NOT NULL,
+            quantidade DECIMAL(20, 8) NOT NULL,
+            custo DECIMAL(20, 2) NOT NULL,
+            moeda CHAR(3) NOT NULL DEFAULT 'BRL',
+            taxa_compra DECIMAL(20, 10) NULL,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """
+
+    def __init__(self, target_currency: str = "BRL"):
+        self.portfolio = Portfolio(target_currency)
+        self.value_series = TimeSeries("carteira")
+        self._table_checked = False
+
+    def ensure_table(self) -> bool:
+        """Cria a tabela de investimentos, se ainda não existir"""
+        if self._table_checked:
+            return True
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self.CREATE_TABLE)
+                # Tabelas criadas antes da taxa da compra ganham a coluna (lotes antigos ficam NULL)
+                cursor.execute("""
+                    SELECT COUNT(*) FROM information_schema.columns
+                    WHERE table_schema = DATABASE()
+                      AND table_name = 'investimentos'
+                      AND column_name = 'taxa_compra'
+                """)
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute("ALTER TABLE investimentos ADD COLUMN taxa_compra DECIMAL(20, 10) NULL")
+                conn.commit()
+                cursor.close()
+            self._table_checked = True
+            return True
+        except Exception as e:
+            print(f"Erro ao criar tabela de investimentos: {e}")
+            return False
+
+    @timed("carregar_investimentos")
+    def load(self) -> Portfolio:
+        """Carrega todos os lotes do banco para uma nova carteira"""
+        portfolio = Portfolio(self.portfolio.target_currency)
+        if self.ensure_table():
+            try:
+                with db.connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        "SELECT ativo, quantidade, custo, moeda, taxa_compra FROM investimentos ORDER BY id"
+                    )
+                    rows = cursor.fetchall()
+                    cursor.close()
+                # Um lote numa moeda diferente da do ativo é ignorado, não a carteira inteira
+                quoted = {}
+                lots = []
+                for row in rows:
+                    asset, currency = row[0], row[3]
+                    if quoted.setdefault(asset, currency) != currency:
+                        print(f"Lote de {asset} em {currency} ignorado: o ativo é cotado em {quoted[asset]}")
+                        continue
+                    lots.append(row)
+                if lots:
+                    assets, quantities, costs, currencies, rates = zip(*lots)
+                    portfolio.add_lots(assets, quantities, costs, currencies, rates)
+            except Exception as e:
+                print(f"Erro ao carregar investimentos: {e}")
+        self.portfolio = portfolio
+        return portfolio
+
+    @timed("adicionar_investimento", is_error=lambda lot: lot is None)
+    def add(self, asset: str, quantity: float, cost: float, currency: str = "BRL", converter=None):
+        """Grava um lote e o inclui na carteira; retorna o índice do lote.
+
+        Com um CurrencyConverter, a taxa do dia é gravada como taxa da compra.
+        Levanta ValueError, sem gravar nada, se o ativo já é cotado em outra moeda.
+        """
+        quoted = self.portfolio.asset_currency_of(asset)
+        if quoted is not None and quoted != currency:
+            raise ValueError(f"{asset} é cotado em {quoted}")
+        if not self.ensure_table():
+            return None
+
+        target = self.portfolio.target_currency
+        purchase_rate = None
+        if currency == target:
+            purchase_rate = 1.0
+        elif converter is not None:
+            purchase_rate = converter.get_exchange_rate(currency, target) or None
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO investimentos (ativo, quantidade, custo, moeda, taxa_compra) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    (asset, quantity, cost, currency, purchase_rate)
+                )
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            print(f"Erro ao adicionar investimento: {e}")
+            return None
+        return self.portfolio.add_lot(asset, quantity, cost, currency, purchase_rate)
+
+    @timed("avaliar_carteira")
+    def valuate(self, converter=None) -> dict:
+        """Atualiza as taxas pelo CurrencyConverter e retorna a avaliação"""
+        if converter is not None:
+            self.portfolio.update_rates(converter)
+        valuation = self.portfolio.valuation()
+        if len(self.portfolio):
+            self.value_series.append(valuation["valor_total"])
+        return valuation
@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from functools import wraps
+
+# Limites superiores (ms) dos baldes do histograma de latência
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class Metric:
+    """Contadores e histograma de latência de uma operação"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float, error: bool = False):
+        index = bisect_left(BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            if elapsed_ms > self.max_ms:
+                self.max_ms = elapsed_ms
+            self.buckets[index] += 1
+            if error:
+                self.errors += 1
+
+    def percentile(self, pct: float) -> float:
+        """Estimativa do percentil pelo limite superior do balde"""
+        with self._lock:
+            target = self.count * pct / 100
+            seen = 0
+            for index, amount in enumerate(self.buckets):
+                seen += amount
+                if amount and seen >= target:
+                    return BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "histogram": dict(zip([f"<={b}" for b in BUCKETS_MS] + [">"], self.buckets))
+        }
+
+
+_metrics = {}
+_registry_lock = threading.Lock()
+
+
+def get_metric(name: str) -> Metric:
+    metric = _metrics.get(name)
+    if metric is None:
+        with _registry_lock:
+            metric = _metrics.setdefault(name, Metric(name))
+    return metric
+
+
+class timed:
+    """Mede a duração de um trecho; funciona como decorator ou context manager.
+
+    is_error(resultado) permite contar como erro retornos como {'error': ...}.
+    """
+
+    def __init__(self, name: str, is_error=None):
+        self.metric = get_metric(name)
+        self.is_error = is_error
+
+    def __call__(self, func):
+        metric = self.metric
+        is_error = self.is_error
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                metric.record((time.perf_counter() - started) * 1000, error=True)
+                raise
+            error = bool(is_error and is_error(result))
+            metric.record((time.perf_counter() - started) * 1000, error=error)
+            return result
+
+        return wrapper
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metric.record((time.perf_counter() - self._started) * 1000, error=exc_type is not None)
+        return False
+
+
+def has_error_key(result) -> bool:
+    return isinstance(result, dict) and "error" in result
+
+
+def snapshot() -> dict:
+    """Retorna o estado atual de todas as métricas"""
+    return {name: metric.snapshot() for name, metric in list(_metrics.items())}
+
+
+def summary(names=None) -> str:
+    """Resumo curto para a barra de status"""
+    parts = []
+    for name in names or sorted(_metrics):
+        metric = _metrics.get(name)
+        if not metric or not metric.count:
+            continue
+        text = f"{name}: {metric.count}x p50 {metric.percentile(50):.0f}ms"
+        if metric.errors:
+            text += f" ({metric.errors} erros)"
+        parts.append(text)
+    return " | ".join(parts)
+
+
+def export(path: str) -> bool:
+    """Acrescenta um snapshot das métricas ao arquivo (uma linha JSON por snapshot)"""
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"data": datetime.now().isoformat(), "metricas": snapshot()}) + "\n")
+        return True
+    except OSError as e:
+        print(f"Erro ao exportar métricas: {e}")
+        return False
+
+
+def reset():
+    """Zera todas as métricas"""
+    for metric in list(_metrics.values()):
+        with metric._lock:
+            metric.clear()
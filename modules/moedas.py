@@ -1,45 +1,567 @@
-import requests
-import mysql.connector
 from dotenv import load_dotenv
+import numpy as np
+import atexit
 import os
-from datetime import datetime
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from database import db
+from modules.metricas import timed
+from modules.coalescencia import SingleFlight
+from modules.rede import HttpClient, UpstreamError
+from modules.agendador import QuotaBudget
 
 load_dotenv()
 
-class CurrencyConverter:
+EXCHANGERATE_API_URL = os.getenv("EXCHANGERATE_API_URL", "https://v6.exchangerate-api.com/v6")
+
+# Cota diária da API, descontada a cada requisição (pré-buscas inclusive) e
+# compartilhada em arquivo entre reinícios e processos
+quota_budget = QuotaBudget(
+    int(os.getenv("EXCHANGERATE_DAILY_QUOTA", 45)),
+    "exchangerate",
+    os.getenv("API_QUOTA_FILE", "cotacoes.sqlite3")
+)
+
+# Cliente compartilhado: timeouts, retentativas e circuit breaker
+_client = HttpClient("exchangerate", budget=quota_budget)
+
+# Moedas exibidas na aba Moedas
+SUPPORTED_CURRENCIES = ["USD", "EUR", "GBP", "BRL", "JPY", "CAD", "AUD", "CHF"]
+
+
+def is_currency_code(code) -> bool:
+    """Código de moeda no formato ISO 4217: exatamente 3 letras"""
+    return isinstance(code, str) and len(code) == 3 and code.isascii() and code.isalpha()
+
+
+def _currency_codes(codes):
+    """Códigos em maiúsculas como array "U3", recusando os que não têm 3 letras (em vez de truncá-los)"""
+    codes = np.char.upper(np.atleast_1d(np.asarray(codes, dtype=str)))
+    invalid = [c for c in np.unique(codes).tolist() if not is_currency_code(c)]
+    if invalid:
+        raise ValueError(f"Códigos de moeda inválidos: {', '.join(invalid)}")
+    return codes.astype("U3")
+
+
+class RateCache:
+    """Cache em memória de taxas de câmbio com TTL e despejo LRU"""
+
+    def __init__(self, ttl: float = 600, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (origem, destino) -> (taxa, expira_em)
+        self._lock = threading.Lock()
+
+    def get(self, from_currency: str, to_currency: str):
+        """Retorna a taxa em cache ou None se ausente/expirada"""
+        key = (from_currency, to_currency)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            rate, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return rate
+
+    def put_many(self, rates: dict, ttl: float = None):
+        """Armazena várias taxas {(origem, destino): taxa} com o mesmo prazo"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            for key, rate in rates.items():
+                self._entries[key] = (rate, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Esvazia o cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RateSnapshotStore:
+    """Instantâneos das tabelas de taxas em SQLite local, para uso offline e consultas por data.
+
+    Cada tabela obtida da API vira um instantâneo (base, atualizado_em, obtido_em):
+    atualizado_em é o horário de validade informado pela API e indexa as consultas
+    de "taxa no instante T"; obtido_em é quando foi buscada e mede o frescor.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cotacoes_instantaneo (
+            id INTEGER PRIMARY KEY,
+            base TEXT NOT NULL,
+            atualizado_em REAL NOT NULL,
+            obtido_em REAL NOT NULL,
+            UNIQUE (base, atualizado_em)
+        );
+        CREATE INDEX IF NOT EXISTS idx_instantaneo_atualizado ON cotacoes_instantaneo (atualizado_em);
+        CREATE INDEX IF NOT EXISTS idx_instantaneo_obtido ON cotacoes_instantaneo (base, obtido_em);
+        CREATE TABLE IF NOT EXISTS cotacoes_taxa (
+            instantaneo_id INTEGER NOT NULL,
+            moeda TEXT NOT NULL,
+            taxa REAL NOT NULL,
+            PRIMARY KEY (instantaneo_id, moeda)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    @timed("gravar_instantaneo")
+    def record(self, base: str, table: dict, updated_at: float = None, fetched_at: float = None):
+        """Grava a tabela de taxas da base; se a API ainda não a atualizou, só renova obtido_em"""
+        fetched_at = fetched_at or time.time()
+        updated_at = updated_at or fetched_at
+        table = dict(table)
+        table.setdefault(base, 1.0)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE cotacoes_instantaneo SET obtido_em = ? WHERE base = ? AND atualizado_em = ?",
+                (fetched_at, base, updated_at)
+            )
+            if cursor.rowcount:
+                return
+            cursor = self._conn.execute(
+                "INSERT INTO cotacoes_instantaneo (base, atualizado_em, obtido_em) VALUES (?, ?, ?)",
+                (base, updated_at, fetched_at)
+            )
+            self._conn.executemany(
+                "INSERT INTO cotacoes_taxa (instantaneo_id, moeda, taxa) VALUES (?, ?, ?)",
+                [(cursor.lastrowid, currency, float(rate)) for currency, rate in table.items() if rate]
+            )
+
+    def latest(self, base: str, max_age: float = None):
+        """Tabela mais recente expressa na base; retorna (taxas, obtido_em) ou (None, None).
+
+        Sem instantâneo próprio da base, usa o mais recente que a contenha e
+        converte as taxas. max_age (segundos) descarta instantâneos mais antigos.
+        """
+        min_fetched = time.time() - max_age if max_age is not None else float("-inf")
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT id, obtido_em FROM cotacoes_instantaneo
+                WHERE base = ? AND obtido_em >= ?
+                ORDER BY obtido_em DESC LIMIT 1
+                """,
+                (base, min_fetched)
+            ).fetchone()
+            if row is None:
+                row = self._conn.execute(
+                    """
+                    SELECT s.id, s.obtido_em FROM cotacoes_instantaneo s
+                    JOIN cotacoes_taxa t ON t.instantaneo_id = s.id AND t.moeda = ?
+                    WHERE s.obtido_em >= ?
+                    ORDER BY s.obtido_em DESC LIMIT 1
+                    """,
+                    (base, min_fetched)
+                ).fetchone()
+            if row is None:
+                return None, None
+            snapshot_id, fetched_at = row
+            table = dict(self._conn.execute(
+                "SELECT moeda, taxa FROM cotacoes_taxa WHERE instantaneo_id = ?", (snapshot_id,)
+            ).fetchall())
+        base_rate = table[base]
+        return {currency: rate / base_rate for currency, rate in table.items()}, fetched_at
+
+    def rate_at(self, from_currency: str, to_currency: str, moment: float):
+        """Taxa do par válida no instante (epoch); retorna (taxa, atualizado_em) ou (None, None)"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT s.atualizado_em, a.taxa, b.taxa FROM cotacoes_instantaneo s
+                JOIN cotacoes_taxa a ON a.instantaneo_id = s.id AND a.moeda = ?
+                JOIN cotacoes_taxa b ON b.instantaneo_id = s.id AND b.moeda = ?
+                WHERE s.atualizado_em <= ?
+                ORDER BY s.atualizado_em DESC LIMIT 1
+                """,
+                (from_currency, to_currency, moment)
+            ).fetchone()
+        if row is None:
+            return None, None
+        updated_at, from_rate, to_rate = row
+        return to_rate / from_rate, updated_at
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def derive_cross_rates(base: str, table: dict, currencies: list = None) -> dict:
+    """Deriva todas as taxas cruzadas entre as moedas a partir de uma tabela base"""
+    currencies = currencies or SUPPORTED_CURRENCIES
+    table = dict(table)
+    table.setdefault(base, 1.0)
+    available = [c for c in currencies if table.get(c)]
+    if base not in available:
+        available.append(base)
+    return {
+        (src, dst): table[dst] / table[src]
+        for src in available
+        for dst in available
+    }
+
+
+class HistoryRollups:
+    """Tabelas de agregação diária e mensal do histórico, mantidas a cada inserção"""
+
+    TABLES = {"dia": "historico_moedas_diario", "mes": "historico_moedas_mensal"}
+
+    CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            periodo DATE NOT NULL,
+            moeda_origem CHAR(3) NOT NULL,
+            moeda_destino CHAR(3) NOT NULL,
+            conversoes INT NOT NULL,
+            volume_origem DECIMAL(20, 2) NOT NULL,
+            volume_convertido DECIMAL(20, 2) NOT NULL,
+            soma_taxas DOUBLE NOT NULL,
+            taxa_min DOUBLE NOT NULL,
+            taxa_max DOUBLE NOT NULL,
+            PRIMARY KEY (periodo, moeda_origem, moeda_destino)
+        )
+    """
+
+    UPSERT = """
+        INSERT INTO {table}
+        (periodo, moeda_origem, moeda_destino, conversoes, volume_origem,
+         volume_convertido, soma_taxas, taxa_min, taxa_max)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            conversoes = conversoes + VALUES(conversoes),
+            volume_origem = volume_origem + VALUES(volume_origem),
+            volume_convertido = volume_convertido + VALUES(volume_convertido),
+            soma_taxas = soma_taxas + VALUES(soma_taxas),
+            taxa_min = LEAST(taxa_min, VALUES(taxa_min)),
+            taxa_max = GREATEST(taxa_max, VALUES(taxa_max))
+    """
+
+    REBUILD = """
+        INSERT INTO {table}
+        (periodo, moeda_origem, moeda_destino, conversoes, volume_origem,
+         volume_convertido, soma_taxas, taxa_min, taxa_max)
+        SELECT {period}, moeda_origem, moeda_destino, COUNT(*), SUM(valor_origem),
+               SUM(valor_convertido), SUM(taxa_cambio), MIN(taxa_cambio), MAX(taxa_cambio)
+        FROM historico_moedas
+        GROUP BY {period}, moeda_origem, moeda_destino
+    """
+
+    PERIOD_SQL = {
+        "dia": "DATE(data_conversao)",
+        "mes": "DATE_FORMAT(data_conversao, '%Y-%m-01')"
+    }
+
+    # Intervalo entre tentativas de preparar as tabelas depois de uma falha
+    SETUP_RETRY = 300
+
     def __init__(self):
-        self.api_key = os.getenv("EXCHANGERATE_API_KEY")
-        self.db_connection = self._create_db_connection()
+        self._ready = False
+        self._missed = False  # linhas gravadas no histórico sem passar pelas agregações
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def period_start(moment: datetime, period: str) -> date:
+        day = moment.date()
+        return day if period == "dia" else day.replace(day=1)
+
+    def ensure_tables(self, conn):
+        """Cria as tabelas de agregação e, se estiverem vazias, preenche a partir do histórico.
+
+        Roda em transação própria, confirmada antes de qualquer lote: se o lote
+        falhar depois, o preenchimento inicial não é desfeito junto. Se houve
+        linhas gravadas sem agregação, as tabelas são recalculadas por inteiro.
+        """
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            cursor = conn.cursor()
+            try:
+                for period, table in self.TABLES.items():
+                    cursor.execute(self.CREATE_TABLE.format(table=table))
+                    if self._missed:
+                        cursor.execute(f"DELETE FROM {table}")
+                        empty = True
+                    else:
+                        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                        empty = cursor.fetchone()[0] == 0
+                    if empty:
+                        cursor.execute(self.REBUILD.format(table=table, period=self.PERIOD_SQL[period]))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+            self._missed = False
+            self._ready = True
 
-    def _create_db_connection(self):
-        """Cria conexão com o MySQL"""
+    def try_ensure_tables(self, conn) -> bool:
+        """Como ensure_tables, mas uma falha (ex.: usuário sem permissão de CREATE)
+        só é registrada e tentada de novo após SETUP_RETRY segundos"""
+        if self._ready:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
         try:
-            return mysql.connector.connect(
-                host=os.getenv("DB_HOST"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                database=os.getenv("DB_NAME")
-            )
+            self.ensure_tables(conn)
+            return True
         except Exception as e:
-            print(f"Erro ao conectar ao banco: {e}")
-            return None
+            if not db.is_available():
+                raise
+            print(f"Erro ao preparar agregações do histórico; o histórico segue sem elas: {e}")
+            self._retry_at = time.monotonic() + self.SETUP_RETRY
+            return False
+
+    def mark_missed(self):
+        """Registra que linhas foram gravadas sem agregação (recalcula ao preparar as tabelas)"""
+        self._missed = True
+
+    def apply(self, cursor, rows):
+        """Soma um lote de linhas do histórico às agregações (mesma transação do INSERT)"""
+        for period, table in self.TABLES.items():
+            groups = {}
+            for from_currency, to_currency, amount, converted, rate, moment in rows:
+                key = (self.period_start(moment, period), from_currency, to_currency)
+                g = groups.get(key)
+                if g is None:
+                    groups[key] = [1, amount, converted, rate, rate, rate]
+                else:
+                    g[0] += 1
+                    g[1] += amount
+                    g[2] += converted
+                    g[3] += rate
+                    g[4] = min(g[4], rate)
+                    g[5] = max(g[5], rate)
+            cursor.executemany(
+                self.UPSERT.format(table=table),
+                [(*key, *values) for key, values in groups.items()]
+            )
+
+
+class HistoryWriter:
+    """Fila write-behind que grava o histórico de conversões em lotes"""
+
+    INSERT_QUERY = """
+        INSERT INTO historico_moedas 
+        (moeda_origem, moeda_destino, valor_origem, valor_convertido, taxa_cambio, data_conversao)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    def __init__(self, batch_size: int = 50, flush_interval: float = 2.0, max_pending: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.rollups = HistoryRollups()
+        self._thread = threading.Thread(target=self._run, name="historico-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, row: tuple):
+        """Enfileira uma linha (origem, destino, valor, convertido, taxa, data)"""
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def add_many(self, rows: list):
+        """Enfileira várias linhas de uma vez"""
+        with self._lock:
+            self._buffer.extend(rows)
+
+    def pending(self) -> int:
+        """Quantidade de linhas aguardando gravação"""
+        with self._lock:
+            return len(self._buffer)
+
+    def _write(self, conn, rows: list, with_rollups: bool = True):
+        """Insere as linhas e soma as agregações numa única transação"""
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(self.INSERT_QUERY, rows)
+            if with_rollups:
+                self.rollups.apply(cursor, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def flush(self) -> bool:
+        """Grava todas as linhas pendentes numa única transação.
+
+        Se o lote for rejeitado, grava linha a linha e descarta (com log) só as
+        linhas que falham sozinhas; com o banco fora do ar, devolve o restante à fila.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return True
+            
+            pending = rows
+            try:
+                with timed("gravar_lote_historico"), db.connection() as conn:
+                    # O histórico só precisa de INSERT: sem as agregações, ele é gravado mesmo assim
+                    with_rollups = self.rollups.try_ensure_tables(conn)
+                    if not with_rollups:
+                        self.rollups.mark_missed()
+                    try:
+                        self._write(conn, rows, with_rollups)
+                        return True
+                    except Exception as e:
+                        print(f"Erro ao salvar lote no histórico, gravando linha a linha: {e}")
+                    
+                    saved_all = True
+                    for index, row in enumerate(rows):
+                        pending = rows[index:]
+                        try:
+                            self._write(conn, [row], with_rollups)
+                        except Exception as e:
+                            if not db.is_available():
+                                raise
+                            print(f"Conversão descartada do histórico {row}: {e}")
+                            saved_all = False
+                    return saved_all
+            except Exception as e:
+                print(f"Erro ao salvar no histórico: {e}")
+                # Devolve as linhas à fila para a próxima tentativa
+                with self._lock:
+                    self._buffer[:0] = pending
+                    # Banco fora do ar por muito tempo: descarta as linhas mais antigas
+                    del self._buffer[:-self.max_pending]
+                return False
+
+    def ensure_rollups(self, conn):
+        """Prepara as agregações sem que um lote seja gravado no meio do recálculo"""
+        with self._flush_lock:
+            self.rollups.ensure_tables(conn)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Interrompe a thread de gravação e descarrega o que estiver pendente"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        atexit.unregister(self.close)
+
+
+class CurrencyConverter:
+    def __init__(self, cache_ttl: float = None, cache_size: int = None,
+                 history_batch_size: int = None, history_flush_interval: float = None):
+        self.api_key = os.getenv("EXCHANGERATE_API_KEY")
+        self.rate_cache = RateCache(
+            ttl=cache_ttl if cache_ttl is not None else float(os.getenv("RATE_CACHE_TTL", 600)),
+            max_entries=cache_size if cache_size is not None else int(os.getenv("RATE_CACHE_SIZE", 256))
+        )
+        self._history_index_checked = False
+        self._inflight = SingleFlight()
+        snapshot_path = os.getenv("RATE_SNAPSHOT_FILE", "cotacoes.sqlite3")
+        self.snapshots = RateSnapshotStore(snapshot_path) if snapshot_path else None
+        self.history_writer = HistoryWriter(
+            batch_size=history_batch_size if history_batch_size is not None else int(os.getenv("HISTORY_BATCH_SIZE", 50)),
+            flush_interval=history_flush_interval if history_flush_interval is not None else float(os.getenv("HISTORY_FLUSH_INTERVAL", 2.0))
+        )
 
+    @timed("cambio", is_error=lambda rate: not rate)
     def get_exchange_rate(self, from_currency: str, to_currency: str) -> float:
-        """Obtém a taxa de câmbio atual da API"""
+        """Obtém a taxa de câmbio atual (cache em memória ou API)"""
+        if from_currency == to_currency:
+            return 1.0
+
+        rate = self.rate_cache.get(from_currency, to_currency)
+        if rate is not None:
+            return rate
+
+        # Pedidos simultâneos da mesma base compartilham uma única requisição
+        table, stale = self._inflight.do(from_currency, self._load_rate_table, from_currency)
+        if not table or not table.get(to_currency):
+            return 0
+
+        rates = derive_cross_rates(from_currency, table)
+        rates[(from_currency, to_currency)] = table[to_currency]
+        self._cache_rates(rates, stale)
+        return table[to_currency]
+
+    def _cache_rates(self, rates: dict, stale: bool):
+        # Taxas obsoletas (API fora do ar) ficam só até a próxima tentativa do circuit breaker
+        ttl = min(self.rate_cache.ttl, _client.breaker.cooldown) if stale else None
+        self.rate_cache.put_many(rates, ttl)
+
+    def refresh_rates(self, base: str) -> dict:
+        """Busca a tabela da base na API e renova o cache, mesmo sem expirar"""
+        table, stale = self._inflight.do(base, self._fetch_rate_table, base)
+        if table:
+            self._cache_rates(derive_cross_rates(base, table), stale)
+        return table or None
+
+    def _load_rate_table(self, base: str) -> tuple:
+        """Usa o instantâneo local se ainda estiver no prazo do cache; senão consulta a API"""
+        if self.snapshots is not None:
+            table, _ = self.snapshots.latest(base, max_age=self.rate_cache.ttl)
+            if table:
+                return table, False
+        return self._fetch_rate_table(base)
+
+    def _fetch_rate_table(self, base: str) -> tuple:
+        """Busca a tabela completa de taxas para a moeda base; retorna (taxas, obsoleta)"""
         try:
-            url = f"https://v6.exchangerate-api.com/v6/{self.api_key}/pair/{from_currency}/{to_currency}"
-            response = requests.get(url)
-            data = response.json()
+            url = f"{EXCHANGERATE_API_URL}/{self.api_key}/latest/{base}"
+            data = _client.get_json(url, cache_key=f"latest/{base}")
             
             if data.get("result") == "success":
-                return data.get("conversion_rate", 0)
+                table = data.get("conversion_rates", {})
+                stale = bool(data.get("_stale"))
+                if self.snapshots is not None and table and not stale:
+                    self.snapshots.record(base, table, data.get("time_last_update_unix"))
+                return table, stale
             else:
                 print(f"Erro na API: {data.get('error-type', 'Erro desconhecido')}")
-                return 0
-                
+                return {}, False
+        
+        except UpstreamError as e:
+            # API fora do ar: serve o último instantâneo gravado em disco
+            table, _ = self.snapshots.latest(base) if self.snapshots is not None else (None, None)
+            if table:
+                return table, True
+            print(f"Erro na requisição: {e}")
+            return {}, False
         except Exception as e:
             print(f"Erro na requisição: {e}")
-            return 0
+            return {}, False
 
     def convert_currency(self, amount: float, from_currency: str, to_currency: str) -> dict:
         """Realiza a conversão e salva no histórico"""
@@ -67,40 +589,244 @@ class CurrencyConverter:
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
+    @timed("converter_lote")
+    def convert_many(self, amounts, from_currencies, to_currencies, save_history: bool = True) -> dict:
+        """Converte vários valores de uma vez.
+
+        from_currencies/to_currencies podem ser listas (uma moeda por valor) ou
+        uma única moeda para todos. Cada par distinto tem a taxa obtida uma vez,
+        a conversão é uma operação vetorizada e o histórico vai num único INSERT.
+        Valores cujo par não tem taxa ficam como NaN em "converted_amounts".
+        Levanta ValueError se algum código de moeda não tiver exatamente 3 letras
+        ou algum valor não for um número finito positivo (como convert_currency).
+        """
+        amounts, from_currencies, to_currencies = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(amounts, dtype=np.float64)),
+            _currency_codes(from_currencies),
+            _currency_codes(to_currencies)
+        )
+        invalid = ~(np.isfinite(amounts) & (amounts > 0))
+        if invalid.any():
+            raise ValueError(f"Valores devem ser números finitos positivos: {amounts[invalid][:5].tolist()}")
+
+        # Pares distintos e o índice de cada valor no vetor de pares
+        pairs, inverse = np.unique(
+            np.char.add(from_currencies, to_currencies), return_inverse=True
+        )
+        pair_rates = np.array(
+            [self.get_exchange_rate(pair[:3], pair[3:]) or np.nan for pair in pairs],
+            dtype=np.float64
+        )
+        rates = pair_rates[inverse]
+        converted = amounts * rates
+
+        valid = ~np.isnan(converted)
+        if save_history and valid.any():
+            now = datetime.now()
+            self.history_writer.add_many([
+                (src, dst, amount, value, rate, now)
+                for src, dst, amount, value, rate in zip(
+                    from_currencies[valid].tolist(), to_currencies[valid].tolist(),
+                    amounts[valid].tolist(), converted[valid].tolist(), rates[valid].tolist()
+                )
+            ])
+            self.history_writer.flush()
+
+        return {
+            "converted_amounts": converted,
+            "rates": rates,
+            "failed_pairs": [f"{p[:3]}/{p[3:]}" for p in pairs[np.isnan(pair_rates)]],
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    @timed("salvar_historico")
     def _save_conversion_history(self, from_currency: str, to_currency: str, 
                                amount: float, converted_amount: float, rate: float) -> bool:
-        """Armazena a conversão no banco de dados"""
-        if not self.db_connection:
-            return False
-            
+        """Enfileira a conversão para gravação em lote no banco de dados"""
+        self.history_writer.add((from_currency, to_currency, amount, converted_amount, rate, datetime.now()))
+        return True
+
+    @timed("consultar_historico")
+    def get_conversion_history(self, limit: int = 10) -> list:
+        """Recupera o histórico de conversões"""
+        # Garante que conversões ainda na fila apareçam no resultado
+        self.history_writer.flush()
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                query = """
+                    SELECT * FROM historico_moedas
+                    ORDER BY data_conversao DESC, id DESC
+                    LIMIT %s
+                """
+                cursor.execute(query, (limit,))
+                rows = cursor.fetchall()
+                cursor.close()
+            return rows
+        except Exception as e:
+            print(f"Erro ao buscar histórico: {e}")
+            return []
+
+    def ensure_history_index(self) -> bool:
+        """Cria o índice (data_conversao, id) usado pela paginação, se ainda não existir"""
         try:
-            cursor = self.db_connection.cursor()
-            query = """
-                INSERT INTO historico_moedas 
-                (moeda_origem, moeda_destino, valor_origem, valor_convertido, taxa_cambio)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (from_currency, to_currency, amount, converted_amount, rate))
-            self.db_connection.commit()
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT COUNT(*) FROM information_schema.statistics
+                    WHERE table_schema = DATABASE()
+                      AND table_name = 'historico_moedas'
+                      AND index_name = 'idx_historico_data_id'
+                """)
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute(
+                        "CREATE INDEX idx_historico_data_id ON historico_moedas (data_conversao, id)"
+                    )
+                cursor.close()
             return True
         except Exception as e:
-            print(f"Erro ao salvar no histórico: {e}")
+            print(f"Erro ao criar índice do histórico: {e}")
             return False
 
-    def get_conversion_history(self, limit: int = 10) -> list:
-        """Recupera o histórico de conversões"""
-        if not self.db_connection:
-            return []
-            
+    @timed("pagina_historico")
+    def get_history_page(self, limit: int = 50, before: tuple = None, after: tuple = None) -> list:
+        """Recupera uma página do histórico (mais recente primeiro) por paginação keyset.
+
+        before/after são cursores (data_conversao, id): before traz as conversões
+        mais antigas que o cursor, after as mais novas.
+        """
+        if not self._history_index_checked:
+            self._history_index_checked = self.ensure_history_index()
+        self.history_writer.flush()
+        
+        if after is not None:
+            where = "WHERE data_conversao > %s OR (data_conversao = %s AND id > %s)"
+            order = "ASC"
+            params = (after[0], after[0], after[1], limit)
+        elif before is not None:
+            where = "WHERE data_conversao < %s OR (data_conversao = %s AND id < %s)"
+            order = "DESC"
+            params = (before[0], before[0], before[1], limit)
+        else:
+            where = ""
+            order = "DESC"
+            params = (limit,)
+        
         try:
-            cursor = self.db_connection.cursor(dictionary=True)
-            query = """
-                SELECT * FROM historico_moedas
-                ORDER BY data_conversao DESC
-                LIMIT %s
-            """
-            cursor.execute(query, (limit,))
-            return cursor.fetchall()
+            with db.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                query = f"""
+                    SELECT * FROM historico_moedas
+                    {where}
+                    ORDER BY data_conversao {order}, id {order}
+                    LIMIT %s
+                """
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                cursor.close()
         except Exception as e:
             print(f"Erro ao buscar histórico: {e}")
-            return []
\ No newline at end of file
+            return []
+        
+        if order == "ASC":
+            rows.reverse()
+        return rows
+
+    @timed("serie_cambio")
+    def get_rate_series(self, from_currency: str, to_currency: str) -> tuple:
+        """Retorna (timestamps, taxas) com a taxa média de cada dia do par.
+
+        Lida do agregado diário: o custo acompanha o número de dias, não o de
+        conversões; o gráfico ainda reduz a série por LTTB se ela for longa.
+        """
+        rows = self.get_rollup_stats("dia", None, from_currency, to_currency)
+        timestamps, rates = [], []
+        for row in reversed(rows):
+            timestamps.append(datetime.combine(row['periodo'], datetime.min.time()).timestamp())
+            rates.append(float(row['taxa_media']))
+        return timestamps, rates
+
+    @timed("consultar_agregados")
+    def get_rollup_stats(self, period: str = "dia", since: date = None,
+                         from_currency: str = None, to_currency: str = None) -> list:
+        """Estatísticas por período e par lidas apenas das tabelas de agregação"""
+        table = HistoryRollups.TABLES[period]
+        self.history_writer.flush()
+        where, params = [], []
+        if since is not None:
+            where.append("periodo >= %s")
+            params.append(since)
+        if from_currency:
+            where.append("moeda_origem = %s")
+            params.append(from_currency)
+        if to_currency:
+            where.append("moeda_destino = %s")
+            params.append(to_currency)
+        query = f"""
+            SELECT periodo, moeda_origem, moeda_destino, conversoes, volume_origem,
+                   volume_convertido, soma_taxas / conversoes AS taxa_media, taxa_min, taxa_max
+            FROM {table}
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY periodo DESC, conversoes DESC
+        """
+        try:
+            with db.connection() as conn:
+                # Instalação existente sem conversões novas: as tabelas ainda não foram criadas
+                self.history_writer.ensure_rollups(conn)
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(query, tuple(params))
+                rows = cursor.fetchall()
+                cursor.close()
+            return rows
+        except Exception as e:
+            print(f"Erro ao buscar agregados: {e}")
+            return []
+
+    def get_weekly_average_rate(self, from_currency: str, to_currency: str, weeks: int = 12) -> list:
+        """Taxa média por semana (segunda-feira como início), a partir do agregado diário"""
+        since = date.today() - timedelta(weeks=weeks)
+        weekly = {}
+        for row in self.get_rollup_stats("dia", since, from_currency, to_currency):
+            week = row['periodo'] - timedelta(days=row['periodo'].weekday())
+            total = weekly.setdefault(week, [0, 0.0])
+            total[0] += row['conversoes']
+            total[1] += row['taxa_media'] * row['conversoes']
+        return [
+            {"semana": week, "conversoes": count, "taxa_media": rate_sum / count}
+            for week, (count, rate_sum) in sorted(weekly.items(), reverse=True)
+        ]
+
+    def get_summary(self, days: int = 30) -> dict:
+        """Resumo dos últimos dias para o painel da aba Moedas"""
+        rows = self.get_rollup_stats("dia", date.today() - timedelta(days=days - 1))
+        pairs = {}
+        for row in rows:
+            pair = pairs.setdefault((row['moeda_origem'], row['moeda_destino']), [0, 0.0])
+            pair[0] += row['conversoes']
+            pair[1] += float(row['taxa_media']) * row['conversoes']
+        top = max(pairs.items(), key=lambda item: item[1][0], default=None)
+        return {
+            "dias": days,
+            "conversoes": sum(count for count, _ in pairs.values()),
+            "pares": len(pairs),
+            "par_mais_usado": top[0] if top else None,
+            "conversoes_par": top[1][0] if top else 0,
+            "taxa_media_par": top[1][1] / top[1][0] if top else None
+        }
+
+    def get_rate_at(self, from_currency: str, to_currency: str, moment: datetime) -> dict:
+        """Taxa do par vigente em um instante, consultada nos instantâneos locais"""
+        if from_currency == to_currency:
+            return {"rate": 1.0, "updated_at": moment}
+        if self.snapshots is None:
+            return {"error": "Instantâneos de câmbio desativados"}
+        rate, updated_at = self.snapshots.rate_at(from_currency, to_currency, moment.timestamp())
+        if rate is None:
+            return {"error": "Nenhuma cotação registrada até essa data"}
+        return {"rate": rate, "updated_at": datetime.fromtimestamp(updated_at)}
+
+    def close(self):
+        """Descarrega o histórico pendente; chame ao encerrar a aplicação"""
+        self.history_writer.close()
+        if self.snapshots is not None:
+            self.snapshots.close()
@@ -0,0 +1,66 @@
+from database import db
+from modules.metricas import timed
+
+
+class NoteManager:
+    """Anotações livres persistidas no MySQL"""
+
+    CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS notas (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            texto TEXT NOT NULL,
+            criada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """
+
+    def __init__(self):
+        self._table_checked = False
+
+    def ensure_table(self) -> bool:
+        """Cria a tabela de notas, se ainda não existir"""
+        if self._table_checked:
+            return True
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self.CREATE_TABLE)
+                conn.commit()
+                cursor.close()
+            self._table_checked = True
+            return True
+        except Exception as e:
+            print(f"Erro ao criar tabela de notas: {e}")
+            return False
+
+    @timed("carregar_notas")
+    def load(self) -> list:
+        """Carrega todas as notas, mais recente por último"""
+        if not self.ensure_table():
+            return []
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("SELECT id, texto, criada_em FROM notas ORDER BY id")
+                rows = cursor.fetchall()
+                cursor.close()
+            return rows
+        except Exception as e:
+            print(f"Erro ao carregar notas: {e}")
+            return []
+
+    @timed("adicionar_nota", is_error=lambda note: note is None)
+    def add(self, text: str):
+        """Insere uma nota e retorna o registro criado (ou None em caso de erro)"""
+        if not self.ensure_table():
+            return None
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("INSERT INTO notas (texto) VALUES (%s)", (text,))
+                conn.commit()
+                note = {"id": cursor.lastrowid, "texto": text}
+                cursor.close()
+        except Exception as e:
+            print(f"Erro ao adicionar nota: {e}")
+            return None
+        return note
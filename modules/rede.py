@@ -0,0 +1,169 @@
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from modules.metricas import get_metric, timed
+
+load_dotenv()
+
+
+class UpstreamError(Exception):
+    """Falha ao consultar a API externa sem valor em cache para servir"""
+
+
+class CircuitOpenError(UpstreamError):
+    """Circuito aberto: a API está indisponível e a chamada nem foi tentada"""
+
+
+class QuotaExhaustedError(UpstreamError):
+    """Orçamento diário da API esgotado: a chamada nem foi tentada"""
+
+
+class CircuitBreaker:
+    """Abre após falhas consecutivas e libera uma tentativa depois do resfriamento"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "fechado"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "fechado":
+                return True
+            if self.state == "aberto" and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "meio-aberto"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = "fechado"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "meio-aberto" or self._failures >= self.failure_threshold:
+                self.state = "aberto"
+                self._opened_at = time.monotonic()
+
+
+class HttpClient:
+    """Cliente HTTP compartilhado com timeouts, retentativas com jitter e
+    circuit breaker. Se a API falhar, serve a última resposta boa da mesma chave.
+
+    max_latency limita as retentativas: nenhuma tentativa começa depois do prazo
+    e os timeouts de conexão e leitura são reduzidos ao tempo restante. Como o
+    timeout de leitura vale por operação de socket, uma resposta que chega aos
+    poucos ainda pode ultrapassar o prazo; ele não é um teto rígido.
+
+    Com um budget (QuotaBudget), cada requisição enviada, inclusive as
+    retentativas, é descontada do orçamento diário da API.
+    """
+
+    def __init__(self, name: str, connect_timeout: float = None, read_timeout: float = None,
+                 retries: int = None, backoff: float = 0.25, max_latency: float = None,
+                 breaker: CircuitBreaker = None, budget=None):
+        self.name = name
+        self.connect_timeout = connect_timeout or float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+        self.read_timeout = read_timeout or float(os.getenv("HTTP_READ_TIMEOUT", 5))
+        self.retries = retries if retries is not None else int(os.getenv("HTTP_RETRIES", 2))
+        self.backoff = backoff
+        self.max_latency = max_latency or float(os.getenv("HTTP_MAX_LATENCY", 10))
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(os.getenv("BREAKER_FAILURES", 5)),
+            cooldown=float(os.getenv("BREAKER_COOLDOWN", 30))
+        )
+        self.budget = budget
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._last_good = {}
+        self._lock = threading.Lock()
+        self._timed = timed(f"http_{name}")
+        self._retries_metric = get_metric(f"http_{name}_retentativas")
+        self._stale_metric = get_metric(f"http_{name}_obsoleto")
+
+    def get_json(self, url: str, cache_key: str = None, params: dict = None) -> dict:
+        """GET idempotente que retorna o JSON da resposta.
+
+        params vai na query string já codificado (nunca interpolado na URL).
+
+        Em falha (ou circuito aberto) devolve a última resposta boa de cache_key
+        marcada com "_stale": True; sem ela, levanta UpstreamError.
+        """
+        try:
+            data = self._timed(self._get_json)(url, params)
+        except UpstreamError:
+            with self._lock:
+                cached = self._last_good.get(cache_key) if cache_key else None
+            if cached is None:
+                raise
+            self._stale_metric.record(0)
+            return {**cached, "_stale": True}
+
+        if cache_key:
+            with self._lock:
+                self._last_good[cache_key] = data
+        return data
+
+    def _charge(self) -> bool:
+        return self.budget is None or self.budget.try_consume()
+
+    def _get_json(self, url: str, params: dict = None) -> dict:
+        # O orçamento é verificado antes do circuito: uma recusa aqui não
+        # consome a sondagem meio-aberta nem conta como falha da API
+        if not self._charge():
+            raise QuotaExhaustedError(f"Cota diária de {self.name} esgotada")
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} indisponível (circuito aberto)")
+
+        deadline = time.monotonic() + self.max_latency
+        last_error = None
+        succeeded = False
+        try:
+            for attempt in range(self.retries + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if attempt and not self._charge():
+                    break
+                try:
+                    response = self.session.get(
+                        url,
+                        params=params,
+                        timeout=(min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+                    )
+                    if response.status_code < 500:
+                        # 4xx é resposta válida da API (ex.: cidade não encontrada)
+                        data = response.json()
+                        succeeded = True
+                        self.breaker.record_success()
+                        return data
+                    last_error = UpstreamError(f"{self.name} respondeu {response.status_code}")
+                except (requests.RequestException, ValueError) as e:
+                    last_error = e
+
+                if attempt < self.retries:
+                    self._retries_metric.record(0)
+                    # Backoff exponencial com jitter completo, sem ultrapassar o prazo
+                    delay = random.uniform(0, self.backoff * 2 ** attempt)
+                    time.sleep(max(min(delay, deadline - time.monotonic()), 0))
+
+            raise UpstreamError(f"Falha ao consultar {self.name}: {last_error or 'tempo esgotado'}")
+        finally:
+            # Qualquer saída sem sucesso conta como falha, inclusive exceções
+            # inesperadas; senão uma sondagem meio-aberta travaria o circuito
+            if not succeeded:
+                self.breaker.record_failure()
+
+    def stats(self) -> dict:
+        return {"circuito": self.breaker.state, "chaves_em_cache": len(self._last_good)}
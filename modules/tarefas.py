@@ -0,0 +1,141 @@
+import threading
+from database import db
+from modules.metricas import timed
+
+
+class TaskStore:
+    """Modelo em memória das tarefas, indexado por id"""
+
+    def __init__(self):
+        self._tasks = {}  # id -> tarefa
+        self._lock = threading.Lock()
+
+    def replace_all(self, tasks: list):
+        with self._lock:
+            self._tasks = {task['id']: task for task in tasks}
+
+    def put(self, task: dict):
+        with self._lock:
+            self._tasks[task['id']] = task
+
+    def remove(self, task_id: int):
+        with self._lock:
+            return self._tasks.pop(task_id, None)
+
+    def get(self, task_id: int):
+        return self._tasks.get(task_id)
+
+    def all(self) -> list:
+        return list(self._tasks.values())
+
+    def __len__(self):
+        return len(self._tasks)
+
+
+class TaskManager:
+    """Persistência das tarefas no MySQL, mantendo o TaskStore sincronizado"""
+
+    CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS tarefas (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            texto VARCHAR(500) NOT NULL,
+            concluida BOOLEAN NOT NULL DEFAULT FALSE,
+            criada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_tarefas_concluida (concluida)
+        )
+    """
+
+    def __init__(self):
+        self.store = TaskStore()
+        self._table_checked = False
+
+    def ensure_table(self) -> bool:
+        """Cria a tabela de tarefas, se ainda não existir"""
+        if self._table_checked:
+            return True
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self.CREATE_TABLE)
+                conn.commit()
+                cursor.close()
+            self._table_checked = True
+            return True
+        except Exception as e:
+            print(f"Erro ao criar tabela de tarefas: {e}")
+            return False
+
+    @timed("carregar_tarefas")
+    def load(self) -> list:
+        """Carrega todas as tarefas do banco para o modelo em memória"""
+        if not self.ensure_table():
+            return []
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("SELECT id, texto, concluida FROM tarefas ORDER BY id")
+                rows = cursor.fetchall()
+                cursor.close()
+        except Exception as e:
+            print(f"Erro ao carregar tarefas: {e}")
+            return []
+
+        tasks = [{"id": r['id'], "texto": r['texto'], "concluida": bool(r['concluida'])} for r in rows]
+        self.store.replace_all(tasks)
+        return tasks
+
+    @timed("adicionar_tarefa", is_error=lambda task: task is None)
+    def add(self, text: str):
+        """Insere uma tarefa e retorna o registro criado (ou None em caso de erro)"""
+        if not self.ensure_table():
+            return None
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("INSERT INTO tarefas (texto) VALUES (%s)", (text,))
+                conn.commit()
+                task = {"id": cursor.lastrowid, "texto": text, "concluida": False}
+                cursor.close()
+        except Exception as e:
+            print(f"Erro ao adicionar tarefa: {e}")
+            return None
+
+        self.store.put(task)
+        return task
+
+    @timed("alternar_tarefa", is_error=lambda task: task is None)
+    def set_done(self, task_id: int, done: bool):
+        """Grava o status informado (não inverte o atual) e retorna o registro atualizado"""
+        task = self.store.get(task_id)
+        if task is None:
+            return None
+        done = bool(done)
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE tarefas SET concluida = %s WHERE id = %s", (done, task_id))
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            print(f"Erro ao atualizar tarefa: {e}")
+            return None
+
+        task = {**task, "concluida": done}
+        self.store.put(task)
+        return task
+
+    @timed("remover_tarefa")
+    def delete(self, task_id: int) -> bool:
+        """Remove uma tarefa do banco e do modelo"""
+        try:
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM tarefas WHERE id = %s", (task_id,))
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            print(f"Erro ao remover tarefa: {e}")
+            return False
+
+        self.store.remove(task_id)
+        return True
@@ -0,0 +1,247 @@
+"""Modo headless: API HTTP/JSON local para conversões, histórico e clima.
+
+Reaproveita modules/moedas.py e modules/clima.py (caches, single-flight e pool
+de conexões compartilhados). O servidor é asyncio; as chamadas bloqueantes
+dos módulos rodam num pool de threads sem travar o loop de eventos.
+
+    python servidor.py --porta 8080
+
+    GET /convert?amount=10&from=USD&to=BRL
+    GET /history?limit=50[&before=<data_conversao>,<id>]
+    GET /rate?from=USD&to=BRL&at=2024-05-01T12:00
+    GET /weather?city=Bauru
+    GET /metrics
+    GET /health
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from urllib.parse import parse_qs, urlsplit
+from dotenv import load_dotenv
+from modules import metricas
+from modules.clima import get_weather
+from modules.moedas import CurrencyConverter, is_currency_code
+
+load_dotenv()
+
+MAX_HEADER_BYTES = 16 * 1024
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _currency_pair(params):
+    """from/to validados antes de qualquer chamada à API (que tem cota diária)"""
+    from_currency = params.get("from", "").upper()
+    to_currency = params.get("to", "").upper()
+    if not from_currency or not to_currency:
+        raise HttpError(400, "Informe from e to")
+    for code in (from_currency, to_currency):
+        if not is_currency_code(code):
+            raise HttpError(400, f"Código de moeda inválido: {code}")
+    return from_currency, to_currency
+
+
+class HeadlessServer:
+    """Servidor HTTP/1.1 mínimo com keep-alive sobre asyncio"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, workers: int = 16):
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="servidor")
+        self.converter = CurrencyConverter()
+        self.routes = {
+            "/convert": self.handle_convert,
+            "/history": self.handle_history,
+            "/rate": self.handle_rate,
+            "/weather": self.handle_weather,
+            "/metrics": self.handle_metrics,
+            "/health": self.handle_health,
+        }
+
+    async def run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    # ---------- rotas ----------
+    async def handle_convert(self, params):
+        try:
+            amount = float(params.get("amount", ""))
+        except ValueError:
+            raise HttpError(400, "amount deve ser numérico")
+        if not math.isfinite(amount):
+            raise HttpError(400, "amount deve ser um número finito")
+        if amount <= 0:
+            raise HttpError(400, "O valor deve ser positivo")
+        from_currency, to_currency = _currency_pair(params)
+        result = await self.run_blocking(self.converter.convert_currency, amount, from_currency, to_currency)
+        if "error" in result:
+            raise HttpError(502, result["error"])
+        return result
+
+    async def handle_history(self, params):
+        try:
+            limit = min(int(params.get("limit", 50)), 1000)
+        except ValueError:
+            raise HttpError(400, "limit deve ser inteiro")
+        if limit < 1:
+            raise HttpError(400, "limit deve ser maior que zero")
+        before = None
+        if params.get("before"):
+            try:
+                moment, row_id = params["before"].rsplit(",", 1)
+                before = (datetime.fromisoformat(moment), int(row_id))
+            except ValueError:
+                raise HttpError(400, "before deve ser <data_conversao>,<id>")
+        rows = await self.run_blocking(self.converter.get_history_page, limit, before=before)
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = f"{last['data_conversao'].isoformat(sep=' ')},{last['id']}"
+        return {"items": rows, "next": next_cursor}
+
+    async def handle_rate(self, params):
+        from_currency, to_currency = _currency_pair(params)
+        try:
+            moment = datetime.fromisoformat(params["at"]) if params.get("at") else datetime.now()
+        except ValueError:
+            raise HttpError(400, "at deve ser uma data ISO 8601")
+        result = await self.run_blocking(self.converter.get_rate_at, from_currency, to_currency, moment)
+        if "error" in result:
+            raise HttpError(404, result["error"])
+        return result
+
+    async def handle_weather(self, params):
+        city = params.get("city", "").strip()
+        if not city:
+            raise HttpError(400, "Informe city")
+        result = await self.run_blocking(get_weather, city)
+        if "error" in result:
+            raise HttpError(502, result["error"])
+        return result
+
+    async def handle_metrics(self, params):
+        return metricas.snapshot()
+
+    async def handle_health(self, params):
+        return {"status": "ok"}
+
+    # ---------- HTTP ----------
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Requisição inválida"}, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Content-Length inválido"}, False)
+                    break
+                if length:
+                    try:
+                        await reader.readexactly(length)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                status, body = await self.dispatch(method, target)
+                await self.respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target):
+        url = urlsplit(target)
+        handler = self.routes.get(url.path)
+        if handler is None:
+            return 404, {"error": "Rota não encontrada"}
+        if method != "GET":
+            return 405, {"error": "Use GET"}
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            return 200, await handler(params)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            print(f"Erro ao processar {url.path}: {e}")
+            return 500, {"error": "Erro interno"}
+
+    async def respond(self, writer, status, body, keep_alive):
+        payload = json.dumps(body, default=_json_default, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+    async def serve(self):
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        print(f"Servidor headless em http://{self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.converter.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Segundo Cérebro em modo headless (HTTP/JSON)")
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--porta", type=int, default=int(os.getenv("SERVER_PORT", 8080)))
+    parser.add_argument("--workers", type=int, default=16,
+                        help="threads para chamadas bloqueantes (API e banco)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(HeadlessServer(args.host, args.porta, args.workers).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.agendador import QuotaBudget
+
+
+class QuotaBudgetTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cotas.sqlite3")
+
+    def test_em_memoria_recusa_alem_do_limite(self):
+        budget = QuotaBudget(2)
+        self.assertTrue(budget.try_consume())
+        self.assertTrue(budget.try_consume())
+        self.assertFalse(budget.try_consume())
+        self.assertEqual(budget.remaining(), 0)
+
+    def test_uso_sobrevive_a_reinicio(self):
+        QuotaBudget(3, "api", self.path).try_consume(2)
+        budget = QuotaBudget(3, "api", self.path)
+        self.assertEqual(budget.remaining(), 1)
+        self.assertTrue(budget.try_consume())
+        self.assertFalse(budget.try_consume())
+
+    def test_processos_compartilham_a_cota(self):
+        app = QuotaBudget(2, "api", self.path)
+        servidor = QuotaBudget(2, "api", self.path)
+        self.assertTrue(app.try_consume())
+        self.assertTrue(servidor.try_consume())
+        self.assertFalse(app.try_consume())
+        self.assertEqual(servidor.remaining(), 0)
+
+    def test_apis_tem_cotas_separadas(self):
+        QuotaBudget(1, "moedas", self.path).try_consume()
+        self.assertEqual(QuotaBudget(1, "clima", self.path).remaining(), 1)
+
+    def test_uso_de_outro_dia_nao_conta(self):
+        budget = QuotaBudget(1, "api", self.path)
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        budget._conn.execute("INSERT INTO cota_api (api, dia, usado) VALUES ('api', ?, 1)", (yesterday,))
+        self.assertEqual(budget.remaining(), 1)
+        self.assertTrue(budget.try_consume())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.busca import SearchIndex, normalize_text, tokenize
+
+
+def ids(results):
+    return [doc_id for _, doc_id, _ in results]
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_remove_acentos_caixa_e_stopwords(self):
+        self.assertEqual(normalize_text("Ação"), "acao")
+        self.assertEqual(tokenize("Reunião de Orçamento da Casa"), ["reuniao", "orcamento", "casa"])
+
+    def test_numeros_com_separador_sao_um_termo(self):
+        self.assertEqual(tokenize("USD 1.234,56"), ["usd", "1.234,56"])
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add(1, "Casa de praia alugada")
+        self.index.add(2, "Consulta no dentista")
+        self.index.add(3, "Comprar passagem para a praia")
+
+    def test_todos_os_termos_sao_exigidos(self):
+        self.assertEqual(ids(self.index.search("casa praia")), [1])
+        self.assertEqual(ids(self.index.search("casa dentista")), [])
+
+    def test_prefixo_do_ultimo_termo(self):
+        self.assertEqual(ids(self.index.search("dent")), [2])
+        self.assertEqual(sorted(ids(self.index.search("pra"))), [1, 3])
+
+    def test_stopword_sendo_digitada_nao_zera_os_resultados(self):
+        for query in ("casa", "casa d", "casa de", "casa de p", "casa de praia"):
+            self.assertEqual(ids(self.index.search(query)), [1], query)
+
+    def test_stopword_final_ainda_casa_por_prefixo(self):
+        self.assertEqual(ids(self.index.search("de")), [2])
+
+    def test_termo_inexistente_zera_os_resultados(self):
+        self.assertEqual(ids(self.index.search("casa xyz")), [])
+        self.assertEqual(ids(self.index.search("da")), [])
+
+    def test_remover_e_reindexar(self):
+        self.index.remove(1)
+        self.assertEqual(ids(self.index.search("casa")), [])
+        self.index.add(3, "Casa nova")
+        self.assertEqual(ids(self.index.search("casa")), [3])
+        self.assertEqual(ids(self.index.search("passagem")), [])
+        self.assertEqual(len(self.index), 2)
+
+    def test_filtro_por_tipo(self):
+        self.index.add(("nota", 1), "Praia no feriado")
+        self.assertEqual(ids(self.index.search("praia", kinds={"nota"})), [("nota", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.agendador import QuotaBudget
+from modules.rede import CircuitBreaker, CircuitOpenError, HttpClient, QuotaExhaustedError, UpstreamError
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_abre_apos_falhas_consecutivas(self):
+        breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, "fechado")
+        self.assertTrue(breaker.allow())
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "aberto")
+        self.assertFalse(breaker.allow())
+
+    def test_sucesso_zera_as_falhas(self):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "fechado")
+
+    def test_meio_aberto_libera_uma_sondagem(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, "meio-aberto")
+        self.assertFalse(breaker.allow())
+
+    def test_sondagem_com_falha_reabre(self):
+        breaker = CircuitBreaker(failure_threshold=5, cooldown=0)
+        for _ in range(5):
+            breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "aberto")
+
+    def test_sondagem_com_sucesso_fecha(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, "fechado")
+        self.assertTrue(breaker.allow())
+
+
+class HttpClientBreakerTest(unittest.TestCase):
+    def make_client(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        return HttpClient("teste", retries=0, backoff=0, max_latency=5, breaker=breaker)
+
+    def test_erro_de_requests_qualquer_conta_como_falha(self):
+        client = self.make_client()
+        for error in (requests.exceptions.ChunkedEncodingError(), requests.TooManyRedirects()):
+            with mock.patch.object(client.session, "get", side_effect=error):
+                with self.assertRaises(UpstreamError):
+                    client.get_json("http://exemplo")
+            self.assertEqual(client.breaker.state, "aberto")
+
+    def test_excecao_inesperada_na_sondagem_nao_trava_o_circuito(self):
+        client = self.make_client()
+        client.breaker.record_failure()
+        with mock.patch.object(client.session, "get", side_effect=RuntimeError("inesperado")):
+            with self.assertRaises(RuntimeError):
+                client.get_json("http://exemplo")
+        self.assertEqual(client.breaker.state, "aberto")
+
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"ok": True}
+        with mock.patch.object(client.session, "get", return_value=response):
+            self.assertEqual(client.get_json("http://exemplo"), {"ok": True})
+        self.assertEqual(client.breaker.state, "fechado")
+
+    def test_circuito_aberto_nao_chama_a_api(self):
+        client = self.make_client()
+        client.breaker.cooldown = 60
+        client.breaker.record_failure()
+        with mock.patch.object(client.session, "get") as get:
+            with self.assertRaises(CircuitOpenError):
+                client.get_json("http://exemplo")
+        get.assert_not_called()
+
+
+class HttpClientBudgetTest(unittest.TestCase):
+    def ok_response(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"ok": True}
+        return response
+
+    def test_cada_requisicao_desconta_do_orcamento(self):
+        budget = QuotaBudget(2)
+        client = HttpClient("teste", retries=0, backoff=0, max_latency=5, budget=budget)
+        with mock.patch.object(client.session, "get", return_value=self.ok_response()) as get:
+            client.get_json("http://exemplo")
+            client.get_json("http://exemplo")
+            with self.assertRaises(QuotaExhaustedError):
+                client.get_json("http://exemplo")
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(budget.remaining(), 0)
+        # Cota esgotada não é falha da API
+        self.assertEqual(client.breaker.state, "fechado")
+
+    def test_retentativas_tambem_sao_descontadas(self):
+        budget = QuotaBudget(2)
+        client = HttpClient("teste", retries=3, backoff=0, max_latency=5, budget=budget)
+        with mock.patch.object(client.session, "get", side_effect=requests.ConnectionError()) as get:
+            with self.assertRaises(UpstreamError):
+                client.get_json("http://exemplo")
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(budget.remaining(), 0)
+
+    def test_cota_esgotada_serve_a_ultima_resposta_boa(self):
+        client = HttpClient("teste", retries=0, backoff=0, max_latency=5, budget=QuotaBudget(1))
+        with mock.patch.object(client.session, "get", return_value=self.ok_response()):
+            client.get_json("http://exemplo", cache_key="k")
+            self.assertEqual(client.get_json("http://exemplo", cache_key="k"), {"ok": True, "_stale": True})
+
+
+if __name__ == "__main__":
+    unittest.main()